@@ -0,0 +1,9 @@
+import pytest
+from core.querybudget import RAISE, assert_within_budget
+
+
+@pytest.fixture
+def query_budget(settings):
+    """Превышение бюджета запросов роняет тест; возвращает проверку ответа."""
+    settings.QUERY_BUDGET_ACTION = RAISE
+    return assert_within_budget
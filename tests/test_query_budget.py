@@ -0,0 +1,27 @@
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+
+class TestQueryBudget:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_feeds_within_budget(self, user_client, few_posts_with_group,
+                                 query_budget):
+        group = few_posts_with_group.group
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(group.slug,)),
+            reverse('posts:profile', args=(few_posts_with_group.author,)),
+            reverse('posts:post_detail', args=(few_posts_with_group.pk,)),
+            reverse('posts:follow_index'),
+        )
+        # Первый показ создаёт миниатюры и пишет хранилище sorl;
+        # бюджет описывает прогретую страницу (manage.py warm_caches).
+        with override_settings(QUERY_BUDGET_ACTION=None):
+            for url in urls:
+                user_client.get(url)
+        for url in urls:
+            response = user_client.get(url)
+            assert response.status_code == 200, url
+            query_budget(response)
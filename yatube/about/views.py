@@ -1,18 +1,24 @@
+from django.utils.decorators import method_decorator
 from django.views.generic.base import TemplateView
 
+from core.querybudget import query_budget
 
+
+@method_decorator(query_budget(3), name='dispatch')
 class AboutAuthorView(TemplateView):
     # В переменной template_name обязательно указывается имя шаблона,
     # на основе которого будет создана возвращаемая страница
     template_name = 'about/author.html'
 
 
+@method_decorator(query_budget(3), name='dispatch')
 class AboutTechView(TemplateView):
     # В переменной template_name обязательно указывается имя шаблона,
     # на основе которого будет создана возвращаемая страница
     template_name = 'about/tech.html'
 
 
+@method_decorator(query_budget(3), name='dispatch')
 class AboutApoutView(TemplateView):
     # В переменной template_name обязательно указывается имя шаблона,
     # на основе которого будет создана возвращаемая страница
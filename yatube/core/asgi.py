@@ -0,0 +1,193 @@
+import asyncio
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Сколько частей потокового ответа может ждать отправки клиенту,
+# прежде чем поток приложения остановится и подождёт.
+QUEUE_SIZE = 16
+# Тело запроса больше этого размера уходит из памяти во временный файл.
+SPOOL_SIZE = 2 * 1024 * 1024
+
+
+# Ключ environ с threading.Event, взводимым при уходе клиента.
+DISCONNECTED = 'yatube.disconnected'
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+def build_environ(scope, body):
+    """Окружение WSGI по области видимости HTTP-запроса ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin1'),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = (
+            scope['client'][0], str(scope['client'][1])
+        )
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = name
+        else:
+            key = f'HTTP_{name}'
+        if key in environ:
+            value = f'{environ[key]},{value}'
+        environ[key] = value
+    return environ
+
+
+class WsgiToAsgi:
+    """ASGI-приложение поверх WSGI-приложения Django.
+
+    Тело запроса читается, а ответ отправляется в цикле событий,
+    поэтому медленный клиент не держит поток. Само приложение
+    выполняется в пуле из max_workers потоков: обычный ответ
+    собирается целиком и поток сразу освобождается, потоковый
+    читается в том же потоке (курсор базы к нему привязан)
+    и ждёт, пока клиент заберёт очередные части.
+
+    Пока ответ отправляется, адаптер слушает receive(): когда клиент
+    уходит, поток приложения узнаёт об этом при следующей части ответа,
+    а долгие ожидания — через threading.Event в environ[DISCONNECTED].
+    """
+
+    def __init__(self, wsgi_application, max_workers, queue_size=QUEUE_SIZE):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='wsgi'
+        )
+        self.queue_size = queue_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип запроса {scope["type"]}')
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(self.queue_size)
+        disconnected = threading.Event()
+        environ = build_environ(scope, body)
+        environ[DISCONNECTED] = disconnected
+        worker = loop.run_in_executor(
+            self.executor, self._run, loop, queue, disconnected, environ
+        )
+        listener = asyncio.ensure_future(
+            self._wait_disconnect(receive, disconnected)
+        )
+        try:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                if not disconnected.is_set():
+                    await send(message)
+        except BaseException:
+            disconnected.set()
+            while await queue.get() is not None:
+                pass
+            raise
+        finally:
+            listener.cancel()
+            try:
+                await worker
+            finally:
+                body.close()
+
+    async def _wait_disconnect(self, receive, disconnected):
+        """Взводит disconnected, когда сервер сообщит об уходе клиента.
+
+        Многие серверы молча игнорируют send() в закрытое соединение,
+        так что без этого поток держал бы ответ до конца.
+        """
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                disconnected.set()
+                return
+
+    async def _read_body(self, receive):
+        """Читает тело запроса; None, если клиент ушёл раньше."""
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                body.seek(0)
+                return body
+
+    def _run(self, loop, queue, disconnected, environ):
+        """Выполняет WSGI-приложение в потоке пула."""
+        def put(message):
+            if disconnected.is_set():
+                raise ClientDisconnected
+            asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+
+        response_start = {}
+
+        def start_response(status, headers, exc_info=None):
+            response_start.update(
+                type='http.response.start',
+                status=int(status.split(' ', 1)[0]),
+                headers=[
+                    (name.lower().encode('latin1'), value.encode('latin1'))
+                    for name, value in headers
+                ],
+            )
+
+        try:
+            result = self.wsgi_application(environ, start_response)
+            try:
+                put(response_start)
+                for chunk in result:
+                    if chunk:
+                        put({
+                            'type': 'http.response.body',
+                            'body': chunk,
+                            'more_body': True,
+                        })
+                put({'type': 'http.response.body', 'body': b''})
+            except ClientDisconnected:
+                pass
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        finally:
+            asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.executor.shutdown
+                )
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
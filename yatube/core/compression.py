@@ -0,0 +1,119 @@
+import gzip
+import re
+import zlib
+
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/x-ndjson',
+    'application/javascript', 'image/svg+xml',
+)
+# Короткие ответы после сжатия почти не уменьшаются.
+MIN_SIZE = 200
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+_accept_encoding = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q=([\d.]+))?')
+
+
+def gzip_compress(data, level=6):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def brotli_compress(data, level=5):
+    return brotli.compress(data, quality=level)
+
+
+def brotli_stream(chunks):
+    compressor = brotli.Compressor(quality=5)
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def available_encodings():
+    """Кодировки в порядке предпочтения; brotli — если установлен."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    accepted = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        match = _accept_encoding.match(part)
+        if match and float(match.group(2) or 1) > 0:
+            accepted.add(match.group(1).lower())
+    return accepted
+
+
+def choose_encoding(request, encodings):
+    accepted = accepted_encodings(request)
+    for encoding in encodings:
+        if encoding in accepted or '*' in accepted:
+            return encoding
+    return None
+
+
+COMPRESSORS = {
+    'br': (brotli_compress, brotli_stream),
+    'gzip': (gzip_compress, gzip_stream),
+}
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает HTML и JSON ответы brotli или gzip.
+
+    Потоковые ответы сжимаются по частям, каждая часть сразу
+    отправляется клиенту. Ответы, в которые попал токен CSRF,
+    не сжимаются: сжатие секрета рядом с данными из запроса
+    открывает атаку BREACH.
+    """
+
+    def process_response(self, request, response):
+        if (
+            response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith(
+                COMPRESSIBLE_TYPES
+            )
+            or request.META.get('CSRF_COOKIE_USED')
+            or (not response.streaming and len(response.content) < MIN_SIZE)
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request, available_encodings())
+        if encoding is None:
+            return response
+        compress, compress_stream = COMPRESSORS[encoding]
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            content = compress(response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        # Сжатое тело уже не совпадает байт в байт с несжатым.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,128 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+
+from core.asgi import WsgiToAsgi, build_environ
+
+
+def http_scope(url):
+    path, _, query = url.partition('?')
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': query.encode(),
+        'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность пула WSGI-воркеров и ASGI-входа '
+        'при одновременных медленных клиентах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clients', type=int, default=64,
+            help='Сколько клиентов держат соединения одновременно.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=4,
+            help='Сколько запросов подряд делает каждый клиент.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Потоков у WSGI-сервера и в пуле ASGI-адаптера.'
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.05,
+            help='Сколько секунд клиент забирает ответ из сокета.'
+        )
+        parser.add_argument(
+            '--url', action='append', dest='urls',
+            help='Страница для запросов; можно указать несколько раз.'
+        )
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or ['/', '/groups/', '/about/author/']
+        total = options['clients'] * options['requests']
+        # Панель отладки замедляет ответы и искажает сравнение.
+        with override_settings(DEBUG=False):
+            wsgi = get_wsgi_application()
+            for name, bench in (('WSGI', self._wsgi), ('ASGI', self._asgi)):
+                started = time.perf_counter()
+                statuses = bench(wsgi, urls, options)
+                elapsed = time.perf_counter() - started
+                errors = sum(status != 200 for status in statuses)
+                self.stdout.write(
+                    f'{name}: {total} запросов за {elapsed:.2f} с, '
+                    f'{total / elapsed:.1f} запросов/с, ошибок: {errors}'
+                )
+
+    def _wsgi(self, wsgi, urls, options):
+        """Синхронный воркер сам отдаёт ответ и ждёт медленного клиента."""
+        delay = options['client_delay']
+
+        def request(number):
+            scope = http_scope(urls[number % len(urls)])
+            status = []
+            result = wsgi(
+                build_environ(scope, io.BytesIO()),
+                lambda line, headers, exc_info=None: status.append(line)
+            )
+            try:
+                for _ in result:
+                    pass
+                time.sleep(delay)
+            finally:
+                result.close()
+            return int(status[0].split()[0])
+
+        total = options['clients'] * options['requests']
+        with ThreadPoolExecutor(options['workers']) as executor:
+            return list(executor.map(request, range(total)))
+
+    def _asgi(self, wsgi, urls, options):
+        """Ответ ждёт клиента в цикле событий, поток уже свободен."""
+        application = WsgiToAsgi(wsgi, max_workers=options['workers'])
+        delay = options['client_delay']
+
+        async def request(url):
+            status = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif not message.get('more_body'):
+                    await asyncio.sleep(delay)
+
+            await application(http_scope(url), receive, send)
+            return status[0]
+
+        async def client(number):
+            return [
+                await request(urls[(number + step) % len(urls)])
+                for step in range(options['requests'])
+            ]
+
+        async def main():
+            results = await asyncio.gather(
+                *(client(number) for number in range(options['clients']))
+            )
+            return [status for statuses in results for status in statuses]
+
+        try:
+            return asyncio.run(main())
+        finally:
+            application.executor.shutdown()
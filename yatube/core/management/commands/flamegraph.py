@@ -0,0 +1,80 @@
+import glob
+import os
+import shutil
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiler import SUFFIX, read, view_filename, write
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает стеки, собранные ProfilerMiddleware, в свёрнутом '
+        'формате для flamegraph.pl, inferno или speedscope. Без '
+        'аргументов показывает профилированные представления. Процессы '
+        'сбрасывают стеки на диск раз в 30 секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'view', nargs='?',
+            help='Имя URL, например posts:index.'
+        )
+        parser.add_argument(
+            '--output', '-o',
+            help='Файл для стеков; по умолчанию — стандартный вывод.'
+        )
+        parser.add_argument(
+            '--top', type=int,
+            help='Вместо стеков показать столько функций с наибольшим '
+                 'собственным временем.'
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить собранные стеки представления после выгрузки.'
+        )
+
+    def handle(self, *args, **options):
+        directory = settings.PROFILER_DIR
+        if not options['view']:
+            return self._list(directory)
+        path = os.path.join(directory, view_filename(options['view']))
+        counts = Counter()
+        for name in glob.glob(os.path.join(path, f'*{SUFFIX}')):
+            counts.update(read(name))
+        if not counts:
+            raise CommandError(f'Стеков для {options["view"]} нет')
+        if options['top']:
+            self._top(counts, options['top'])
+        elif options['output']:
+            write(os.path.abspath(options['output']), counts)
+        else:
+            for stack, samples in sorted(counts.items()):
+                self.stdout.write(f'{stack} {samples}')
+        if options['clear']:
+            shutil.rmtree(path)
+
+    def _list(self, directory):
+        views = sorted(
+            (sum(sum(read(name).values()) for name in glob.glob(
+                os.path.join(directory, view, f'*{SUFFIX}')
+            )), view)
+            for view in (os.listdir(directory) if os.path.isdir(directory)
+                         else ())
+        )
+        if not views:
+            self.stdout.write('Профилей нет.')
+        for samples, view in reversed(views):
+            self.stdout.write(f'{samples:8}  {view}')
+
+    def _top(self, counts, limit):
+        total = sum(counts.values())
+        own = Counter()
+        for stack, samples in counts.items():
+            own[stack.rpartition(';')[2]] += samples
+        for function, samples in own.most_common(limit):
+            self.stdout.write(
+                f'{samples / total:6.1%} {samples:8}  {function}'
+            )
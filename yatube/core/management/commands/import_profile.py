@@ -0,0 +1,91 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Код, который выполняет холодный процесс: то же, что делает воркер
+# до первого запроса, — загрузка приложения и всех URL.
+WORKER_START = '''
+import json, resource, time
+started = time.perf_counter()
+from yatube.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+'''
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(output):
+    """Собственное время импорта модулей, мкс, из вывода -X importtime."""
+    modules = {}
+    for line in output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(1))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает холодный воркер в отдельном процессе и показывает '
+        'время старта, память и самые дорогие импорты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile', action='append', dest='profiles',
+            choices=settings.RUNTIME_PROFILES,
+            help='Профиль запуска; можно указать несколько для сравнения.'
+        )
+        parser.add_argument(
+            '--top', type=int, default=15,
+            help='Сколько самых дорогих модулей показать.'
+        )
+
+    def handle(self, *args, **options):
+        for profile in options['profiles'] or settings.RUNTIME_PROFILES:
+            stats, modules = self._start_worker(profile)
+            packages = Counter()
+            for name, micros in modules.items():
+                packages[name.split('.')[0]] += micros
+            self.stdout.write(
+                f'{profile}: старт {stats["seconds"] * 1000:.0f} мс, '
+                f'память {stats["maxrss_kb"] / 1024:.1f} МБ, '
+                f'модулей {len(modules)}'
+            )
+            self.stdout.write('  пакеты:')
+            for name, micros in packages.most_common(options['top']):
+                self.stdout.write(f'    {micros / 1000:8.1f} мс  {name}')
+            self.stdout.write('  модули:')
+            for name, micros in Counter(modules).most_common(options['top']):
+                self.stdout.write(f'    {micros / 1000:8.1f} мс  {name}')
+
+    def _start_worker(self, profile):
+        env = {
+            **os.environ,
+            'YATUBE_PROFILE': profile,
+            # Для замера старта ключ не важен, но production его требует.
+            'YATUBE_SECRET_KEY': os.environ.get(
+                'YATUBE_SECRET_KEY', 'import-profile'
+            ),
+            'DJANGO_SETTINGS_MODULE': os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'yatube.settings'
+            ),
+        }
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', WORKER_START],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        return stats, parse_importtime(result.stderr)
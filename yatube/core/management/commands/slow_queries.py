@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from core.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает самые дорогие медленные запросы за последние часы: '
+        'отпечаток SQL, представление, стек и план выполнения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=24,
+            help='За сколько последних часов строить отчёт.'
+        )
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Сколько запросов показать.'
+        )
+        parser.add_argument(
+            '--no-plans', action='store_false', dest='plans',
+            help='Не выводить планы выполнения.'
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(hours=options['hours'])
+        rows = SlowQuery.objects.filter(hour__gte=since).values(
+            'fingerprint'
+        ).annotate(
+            calls=Sum('calls'), total_ms=Sum('total_ms'), max_ms=Max('max_ms')
+        ).order_by('-total_ms')[:options['top']]
+        if not rows:
+            self.stdout.write('Медленных запросов нет.')
+        for number, row in enumerate(rows, 1):
+            sample = SlowQuery.objects.filter(
+                fingerprint=row['fingerprint'], hour__gte=since
+            ).order_by('-hour').first()
+            self.stdout.write(
+                f'{number}. {row["calls"]} раз, всего '
+                f'{row["total_ms"]:.0f} мс, в среднем '
+                f'{row["total_ms"] / row["calls"]:.0f} мс, '
+                f'максимум {row["max_ms"]:.0f} мс — {sample.view}'
+            )
+            self.stdout.write(f'   {sample.sql}')
+            for line in sample.stack.splitlines():
+                self.stdout.write(f'   > {line}')
+            if options['plans'] and sample.plan:
+                for line in sample.plan.splitlines():
+                    self.stdout.write(f'   | {line}')
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40)),
+                ('hour', models.DateTimeField()),
+                ('sql', models.TextField()),
+                ('view', models.CharField(blank=True, max_length=200)),
+                ('stack', models.TextField(blank=True)),
+                ('plan', models.TextField(blank=True)),
+                ('calls', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='slowquery',
+            index=models.Index(fields=['hour'], name='slowquery_hour_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='slowquery',
+            unique_together={('fingerprint', 'hour')},
+        ),
+    ]
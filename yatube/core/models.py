@@ -0,0 +1,24 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """Медленные запросы одного вида за час.
+
+    Запросы сведены по отпечатку — SQL без значений параметров,
+    поэтому в журнал не попадают данные пользователей.
+    """
+    fingerprint = models.CharField(max_length=40)
+    hour = models.DateTimeField()
+    sql = models.TextField()
+    view = models.CharField(max_length=200, blank=True)
+    stack = models.TextField(blank=True)
+    plan = models.TextField(blank=True)
+    calls = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('fingerprint', 'hour')
+        indexes = [
+            models.Index(fields=['hour'], name='slowquery_hour_idx'),
+        ]
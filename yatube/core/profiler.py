@@ -0,0 +1,209 @@
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 30
+# Стеки глубже обрезаются со стороны корня.
+MAX_DEPTH = 100
+SUFFIX = '.folded'
+
+
+def frame_label(code, module):
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f'{module}:{name}'.replace(';', ':').replace(' ', '_')
+
+
+def collapse(frame, roots, labels):
+    """Стек кадра в свёрнутом виде: корень;...;лист.
+
+    Кадры выше корня — сервер и промежуточные слои — отбрасываются.
+    """
+    stack = []
+    while frame is not None and len(stack) < MAX_DEPTH:
+        code = frame.f_code
+        label = labels.get(code)
+        if label is None:
+            label = labels[code] = frame_label(
+                code, frame.f_globals.get('__name__', '?')
+            )
+        stack.append(label)
+        if code in roots:
+            break
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+def view_filename(view):
+    return view.replace('/', '_').replace(':', '.') or 'root'
+
+
+class Sampler:
+    """Снимает стеки выбранных потоков раз в interval секунд.
+
+    Поток, обрабатывающий выбранный запрос, регистрируется на время
+    обработки; пока таких нет, фоновый поток только досыпает
+    до ближайшей записи и завершается. Стеки копятся по представлениям
+    и раз в FLUSH_INTERVAL секунд сливаются в файлы процесса
+    <dir>/<представление>/<pid>.folded.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.threads = {}
+        self.stacks = defaultdict(Counter)
+        self.roots = set()
+        self.labels = {}
+        self.thread = None
+
+    @contextmanager
+    def track(self, counts):
+        """Собирает стеки текущего потока в counts на время блока."""
+        ident = threading.get_ident()
+        with self.lock:
+            self.threads[ident] = counts
+        self.ensure_sampler()
+        try:
+            yield counts
+        finally:
+            with self.lock:
+                self.threads.pop(ident, None)
+
+    def add(self, view, counts):
+        with self.lock:
+            self.stacks[view].update(counts)
+
+    def sample(self):
+        with self.lock:
+            targets = dict(self.threads)
+        frames = sys._current_frames()
+        stacks = {}
+        for ident in targets:
+            frame = frames.get(ident)
+            if frame is not None:
+                stacks[ident] = collapse(frame, self.roots, self.labels)
+        # Счётчики меняются под замком и только у ещё отслеживаемых
+        # потоков: закончивший запрос уже отдал их в add().
+        with self.lock:
+            for ident, stack in stacks.items():
+                counts = self.threads.get(ident)
+                if counts is targets[ident]:
+                    counts[stack] += 1
+
+    def ensure_sampler(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, name='profiler', daemon=True
+                )
+                self.thread.start()
+
+    def _run(self):
+        interval = settings.PROFILER_INTERVAL_MS / 1000
+        flushed = time.monotonic()
+        while True:
+            time.sleep(interval)
+            with self.lock:
+                if not self.threads and not self.stacks:
+                    self.thread = None
+                    break
+            self.sample()
+            if time.monotonic() - flushed >= FLUSH_INTERVAL:
+                try:
+                    self.flush()
+                except OSError:
+                    logger.exception('Не удалось записать профили')
+                flushed = time.monotonic()
+
+    def flush(self, directory=None):
+        """Сливает накопленное с файлами процесса; возвращает их число."""
+        with self.lock:
+            stacks, self.stacks = self.stacks, defaultdict(Counter)
+        directory = directory or settings.PROFILER_DIR
+        for view, counts in stacks.items():
+            path = os.path.join(
+                directory, view_filename(view), f'{os.getpid()}{SUFFIX}'
+            )
+            counts.update(read(path))
+            write(path, counts)
+        return len(stacks)
+
+
+def read(path):
+    """Счётчик стеков из файла в свёрнутом формате."""
+    counts = Counter()
+    try:
+        with open(path, encoding='utf-8') as lines:
+            for line in lines:
+                stack, _, samples = line.rstrip('\n').rpartition(' ')
+                if stack and samples.isdigit():
+                    counts[stack] += int(samples)
+    except FileNotFoundError:
+        pass
+    return counts
+
+
+def write(path, counts):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(handle, 'w', encoding='utf-8') as out:
+        for stack, samples in sorted(counts.items()):
+            out.write(f'{stack} {samples}\n')
+    os.replace(temporary, path)
+
+
+class ProfilerMiddleware:
+    """Профилирует долю PROFILER_RATE запросов сэмплированием стеков.
+
+    Стеки собираются по имени URL, включая рендеринг шаблонов и отдачу
+    потоковых ответов; manage.py flamegraph выгружает их для flamegraph.pl
+    или speedscope. Остальные запросы почти ничего не платят.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        sampler.roots.update((
+            type(self).__call__.__code__, type(self)._tracked.__code__,
+        ))
+
+    def __call__(self, request):
+        rate = settings.PROFILER_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+        counts = Counter()
+        with sampler.track(counts):
+            response = self.get_response(request)
+        view = self.view_name(request)
+        if response.streaming:
+            response.streaming_content = self._tracked(
+                response.streaming_content, view, counts
+            )
+        else:
+            sampler.add(view, counts)
+        return response
+
+    def _tracked(self, chunks, view, counts):
+        chunks = iter(chunks)
+        while True:
+            with sampler.track(counts):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+        sampler.add(view, counts)
+
+    def view_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match else 'unresolved'
+
+
+sampler = Sampler()
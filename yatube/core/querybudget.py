@@ -0,0 +1,145 @@
+import logging
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+
+logger = logging.getLogger(__name__)
+
+LOG = 'log'
+RAISE = 'raise'
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class Budget:
+    """Сколько запросов и миллисекунд в базе разрешено представлению."""
+
+    def __init__(self, queries, ms=None):
+        self.queries = queries
+        self.ms = ms
+
+    def __repr__(self):
+        return f'Budget(queries={self.queries}, ms={self.ms})'
+
+
+class Usage:
+    """Считает запросы и время в базе; подключается execute_wrapper."""
+
+    def __init__(self):
+        self.queries = []
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries.append(sql)
+
+    @property
+    def ms(self):
+        return self.seconds * 1000
+
+
+def check(name, budget, usage, action=RAISE):
+    """Сообщает о превышении бюджета.
+
+    Число запросов детерминировано, и при action=RAISE его превышение
+    роняет запрос; время зависит от машины и только пишется в лог.
+    """
+    if len(usage.queries) > budget.queries:
+        message = (
+            f'{name}: {len(usage.queries)} запросов при бюджете '
+            f'{budget.queries}:\n' + '\n'.join(usage.queries)
+        )
+        if action == RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    if budget.ms is not None and usage.ms > budget.ms:
+        logger.warning(
+            '%s: %.1f мс в базе при бюджете %s мс', name, usage.ms, budget.ms
+        )
+
+
+def _tracked(chunks, name, budget, usage, action):
+    """Считает запросы, сделанные при отдаче потокового ответа."""
+    chunks = iter(chunks)
+    while True:
+        with connection.execute_wrapper(usage):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        yield chunk
+    check(name, budget, usage, action)
+
+
+def query_budget(queries, ms=None):
+    """Объявляет бюджет представления: число запросов и время в базе.
+
+    Проверка включается настройкой QUERY_BUDGET_ACTION: 'log' пишет
+    предупреждение, 'raise' бросает QueryBudgetExceeded (в тестах),
+    None выключает подсчёт. Учитывается и рендеринг шаблона, и для
+    потоковых ответов — отдача содержимого. Итог запроса доступен
+    тестам в response.query_usage.
+    """
+    budget = Budget(queries, ms)
+
+    def decorator(view_func):
+        # method_decorator передаёт метод представления-класса
+        # как partial от связанного метода.
+        func = getattr(view_func, 'func', view_func)
+        owner = type(func.__self__) if hasattr(func, '__self__') else func
+        name = f'{owner.__module__}.{owner.__qualname__}'
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            action = settings.QUERY_BUDGET_ACTION
+            if action is None:
+                return view_func(request, *args, **kwargs)
+            usage = Usage()
+            with connection.execute_wrapper(usage):
+                response = view_func(request, *args, **kwargs)
+            if response.streaming:
+                response.streaming_content = _tracked(
+                    response.streaming_content, name, budget, usage, action
+                )
+            else:
+                check(name, budget, usage, action)
+            response.query_budget = budget
+            response.query_usage = usage
+            return response
+
+        wrapper.query_budget = budget
+        return wrapper
+    return decorator
+
+
+def enforce_budgets():
+    """Включает проверку бюджетов с исключением; для тестов."""
+    return override_settings(QUERY_BUDGET_ACTION=RAISE)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Проверяет, что блок сделал не больше limit запросов."""
+    usage = Usage()
+    with connection.execute_wrapper(usage):
+        yield usage
+    check('блок', Budget(limit), usage)
+
+
+def assert_within_budget(response):
+    """Проверяет ответ представления с бюджетом против его бюджета."""
+    budget = getattr(response, 'query_budget', None)
+    if budget is None:
+        raise AssertionError('Бюджет запросов не проверялся')
+    if response.streaming:
+        b''.join(response.streaming_content)
+    check('ответ', budget, response.query_usage)
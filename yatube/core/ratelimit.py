@@ -0,0 +1,105 @@
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """Разбирает лимит вида '10/m' в пару (запросов, секунд)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_key(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def _cache():
+    return caches[getattr(settings, 'RATELIMIT_CACHE', 'default')]
+
+
+def hit(key, limit, period, now=None):
+    """Учитывает запрос и сообщает, укладывается ли он в лимит.
+
+    Скользящее окно из двух соседних счётчиков: запросы прошлого окна
+    учитываются с весом, убывающим по мере хода текущего. Счётчики
+    меняются только через add/incr/decr, поэтому с общим для процессов
+    кэшем (RATELIMIT_CACHE) лимит общий для всего сайта.
+    """
+    now = time.time() if now is None else now
+    window = int(now // period)
+    cache = _cache()
+    current_key = f'rl:{key}:{window}'
+    cache.add(current_key, 0, period * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        cache.add(current_key, 1, period * 2)
+        current = 1
+    previous = cache.get(f'rl:{key}:{window - 1}', 0)
+    elapsed = now / period - window
+    if previous * (1 - elapsed) + current <= limit:
+        return True
+    # Отклонённый запрос не расходует лимит, как и в token bucket.
+    try:
+        cache.decr(current_key)
+    except ValueError:
+        pass
+    return False
+
+
+def record_rejection(view_name):
+    cache = _cache()
+    key = f'rl:rejected:{view_name}'
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+    logger.warning('Превышен лимит запросов к %s', view_name)
+
+
+def rejected(view_names):
+    """Сколько запросов к каждому представлению отклонено лимитом."""
+    keys = {f'rl:rejected:{name}': name for name in view_names}
+    counts = _cache().get_many(list(keys))
+    return {name: counts.get(key, 0) for key, name in keys.items()}
+
+
+def ratelimit(rate, methods=('POST',)):
+    """Ограничивает частоту запросов к представлению.
+
+    Ключ — пользователь (или IP для гостей) и имя URL. Лимит можно
+    переопределить в settings.RATELIMITS по имени URL, а весь механизм
+    выключить через settings.RATELIMIT_ENABLED.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if (
+                not getattr(settings, 'RATELIMIT_ENABLED', True)
+                or (methods and request.method not in methods)
+            ):
+                return view_func(request, *args, **kwargs)
+            view_name = request.resolver_match.view_name
+            limit, period = parse_rate(
+                getattr(settings, 'RATELIMITS', {}).get(view_name, rate)
+            )
+            key = f'{view_name}:{client_key(request)}'
+            if not hit(key, limit, period):
+                record_rejection(view_name)
+                response = render(request, 'core/429.html', status=429)
+                response['Retry-After'] = str(period)
+                return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
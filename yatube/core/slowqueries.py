@@ -0,0 +1,242 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 30
+# Сколько часов хранить журнал; отчёт строится по этому окну.
+RETENTION_HOURS = 7 * 24
+STACK_DEPTH = 3
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+
+_string = re.compile(r"'(?:[^']|'')*'")
+_number = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+_placeholder = re.compile(r'%s')
+_value_list = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_spaces = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """SQL без значений: строки, числа и списки IN заменены на ?."""
+    sql = _string.sub('?', sql)
+    sql = _number.sub('?', sql)
+    sql = _placeholder.sub('?', sql)
+    sql = _value_list.sub('(...)', sql)
+    return _spaces.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(sql.encode()).hexdigest()
+
+
+def stack_summary(depth=STACK_DEPTH):
+    """Последние кадры кода проекта, откуда пришёл запрос."""
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(settings.BASE_DIR)
+        and 'site-packages' not in frame.filename
+        and frame.filename != __file__
+    ]
+    return '\n'.join(
+        f'{os.path.relpath(frame.filename, settings.BASE_DIR)}:'
+        f'{frame.lineno} {frame.name}'
+        for frame in frames[-depth:]
+    )
+
+
+def explain(sql, params):
+    """План запроса; пустая строка, если базу не спросить."""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if prefix is None or not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    try:
+        # Ошибка внутри транзакции PostgreSQL прервала бы её целиком,
+        # поэтому там план запрашивается в точке сохранения.
+        if connection.in_atomic_block:
+            with transaction.atomic():
+                rows = _explain_rows(prefix + sql, params)
+        else:
+            rows = _explain_rows(prefix + sql, params)
+    except DatabaseError:
+        return ''
+    if connection.vendor == 'sqlite':
+        return '\n'.join(str(row[-1]) for row in rows)
+    return '\n'.join(' '.join(map(str, row)) for row in rows)
+
+
+def _explain_rows(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+class Entry:
+    def __init__(self, sql, view, stack, plan):
+        self.sql = sql
+        self.view = view
+        self.stack = stack
+        self.plan = plan
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class SlowQueryLog:
+    """Медленные запросы процесса, сводимые в таблицу по часам.
+
+    Запрос только дополняет словарь в памяти; раз в FLUSH_INTERVAL
+    секунд фоновый поток добавляет накопленное в SlowQuery и удаляет
+    часы старше RETENTION_HOURS. План запрашивается один раз
+    на отпечаток за жизнь процесса.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.explained = set()
+        self.thread = None
+
+    def record(self, sql, params, many, ms, view):
+        normalized = normalize(sql)
+        key = fingerprint(normalized)
+        with self.lock:
+            entry = self.entries.get(key)
+            need_plan = key not in self.explained
+            self.explained.add(key)
+        if entry is None:
+            plan = '' if many or not need_plan else explain(sql, params)
+            entry = Entry(normalized, view, stack_summary(), plan)
+        with self.lock:
+            entry = self.entries.setdefault(key, entry)
+            entry.calls += 1
+            entry.total_ms += ms
+            entry.max_ms = max(entry.max_ms, ms)
+        self.ensure_flusher()
+
+    def ensure_flusher(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, name='slow-queries', daemon=True
+                )
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            with self.lock:
+                if not self.entries:
+                    self.thread = None
+                    break
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.exception('Не удалось записать медленные запросы')
+                connection.close()
+        connection.close()
+
+    def flush(self, now=None):
+        """Пишет накопленное в базу; возвращает число отпечатков."""
+        with self.lock:
+            entries, self.entries = self.entries, {}
+        if not entries:
+            return 0
+        now = now or timezone.now()
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        with transaction.atomic():
+            SlowQuery.objects.bulk_create([
+                SlowQuery(
+                    fingerprint=key, hour=hour, sql=entry.sql,
+                    view=entry.view, stack=entry.stack, plan=entry.plan,
+                )
+                for key, entry in entries.items()
+            ], ignore_conflicts=True)
+            for key, entry in entries.items():
+                changes = {
+                    'calls': F('calls') + entry.calls,
+                    'total_ms': F('total_ms') + entry.total_ms,
+                    'max_ms': Greatest('max_ms', entry.max_ms),
+                }
+                if entry.plan:
+                    changes['plan'] = entry.plan
+                SlowQuery.objects.filter(
+                    fingerprint=key, hour=hour
+                ).update(**changes)
+            SlowQuery.objects.filter(
+                hour__lt=hour - timedelta(hours=RETENTION_HOURS)
+            ).delete()
+        return len(entries)
+
+
+class Recorder:
+    """Обёртка выполнения запросов, замечающая медленные."""
+
+    def __init__(self, request, threshold_ms):
+        self.request = request
+        self.threshold_ms = threshold_ms
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        ms = (time.perf_counter() - started) * 1000
+        if ms >= self.threshold_ms and not sql.startswith('EXPLAIN'):
+            log.record(sql, params, many, ms, self.view_name())
+        return result
+
+    def view_name(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else self.request.path[:200]
+
+
+class SlowQueryMiddleware:
+    """Включает журнал медленных запросов на время обработки запроса.
+
+    Порог — SLOW_QUERY_MS миллисекунд; None выключает журнал. Потоковые
+    ответы отслеживаются и во время отдачи содержимого.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.SLOW_QUERY_MS
+        if threshold is None:
+            return self.get_response(request)
+        recorder = Recorder(request, threshold)
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = self._tracked(
+                response.streaming_content, recorder
+            )
+        return response
+
+    def _tracked(self, chunks, recorder):
+        chunks = iter(chunks)
+        while True:
+            with connection.execute_wrapper(recorder):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+
+
+log = SlowQueryLog()
@@ -0,0 +1,51 @@
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.utils.functional import cached_property
+
+from .compression import COMPRESSORS, SUFFIXES, available_encodings
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico',
+)
+MIN_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем в имени и предсжатыми копиями рядом.
+
+    После сборки для каждого текстового файла с хешем пишутся
+    .gz (и .br, если установлен brotli) с максимальным сжатием,
+    чтобы при раздаче не тратить на это процессор.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            for compressed_name in self.compress(name):
+                yield name, compressed_name, True
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as source:
+            content = source.read()
+        if len(content) < MIN_SIZE:
+            return
+        for encoding in available_encodings():
+            compress, _ = COMPRESSORS[encoding]
+            level = 11 if encoding == 'br' else 9
+            compressed = compress(content, level)
+            if len(compressed) >= len(content):
+                continue
+            compressed_name = name + SUFFIXES[encoding]
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            yield compressed_name
+
+    @cached_property
+    def hashed_names(self):
+        """Имена файлов с хешем: их можно кэшировать навсегда."""
+        return set(self.hashed_files.values())
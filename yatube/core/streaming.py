@@ -0,0 +1,71 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+STREAM_MARKER = mark_safe('<!-- stream -->')
+CHUNK_SIZE = 500
+
+
+def stream_render(request, template_name, context, items, item_template,
+                  item_name):
+    """Отдаёт страницу потоком: шапка сразу, элементы списка по одному.
+
+    Шаблон рендерится заранее с маркером stream_marker на месте
+    списка, поэтому контекст страницы доступен как обычно; элементы
+    рендерятся шаблоном item_template по мере чтения из items.
+    """
+    html = render_to_string(
+        template_name, {**context, 'stream_marker': STREAM_MARKER}, request
+    )
+    head, _, tail = html.partition(STREAM_MARKER)
+    item = get_template(item_template)
+
+    def content():
+        yield head
+        for obj in items:
+            yield item.render({**context, item_name: obj}, request)
+        yield tail
+
+    return StreamingHttpResponse(
+        content(), content_type='text/html; charset=utf-8'
+    )
+
+
+class _Echo:
+    """Файлоподобный объект, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, header, filename):
+    """Ответ CSV, который пишется по строке из итератора rows."""
+    writer = csv.writer(_Echo())
+
+    def content():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(
+        content(), content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_jsonl(rows, filename):
+    """Ответ JSON Lines: по объекту JSON на строку."""
+    content = (
+        json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+        for row in rows
+    )
+    response = StreamingHttpResponse(
+        content, content_type='application/x-ndjson; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,416 @@
+import asyncio
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.wsgi import get_wsgi_application
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import get_resolver, reverse
+
+from . import profiler, ratelimit, slowqueries
+from .asgi import DISCONNECTED, WsgiToAsgi
+from .compression import CompressionMiddleware
+from .management.commands.import_profile import parse_importtime
+from .models import SlowQuery
+from .querybudget import (QueryBudgetExceeded, assert_max_queries,
+                          enforce_budgets, query_budget)
+from .views import serve_static
+
+User = get_user_model()
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ratelimit._cache().clear()
+        self.user = User.objects.create_user(username='user')
+        self.client.force_login(self.user)
+
+    def test_sliding_window(self):
+        """Запросы прошлого окна учитываются с убывающим весом."""
+        for _ in range(2):
+            self.assertTrue(ratelimit.hit('key', 2, 60, now=0))
+        self.assertFalse(ratelimit.hit('key', 2, 60, now=1))
+        self.assertFalse(ratelimit.hit('key', 2, 60, now=61))
+        self.assertTrue(ratelimit.hit('key', 2, 60, now=115))
+
+    @override_settings(RATELIMITS={'posts:post_create': '2/m'})
+    def test_write_view_returns_429(self):
+        """Превышение лимита даёт 429 и учитывается в метриках."""
+        url = reverse('posts:post_create')
+        for _ in range(2):
+            response = self.client.post(url, {'text': 'Пост'})
+            self.assertEqual(response.status_code, 302)
+        response = self.client.post(url, {'text': 'Пост'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(
+            ratelimit.rejected(['posts:post_create']),
+            {'posts:post_create': 1}
+        )
+
+    @override_settings(
+        RATELIMIT_ENABLED=False, RATELIMITS={'posts:post_create': '1/m'}
+    )
+    def test_can_be_disabled(self):
+        url = reverse('posts:post_create')
+        for _ in range(2):
+            response = self.client.post(url, {'text': 'Пост'})
+            self.assertEqual(response.status_code, 302)
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_html_is_compressed(self):
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('Последние обновления', gzip.decompress(
+            response.content
+        ).decode())
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response_is_compressed_by_chunks(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = StreamingHttpResponse(
+            (f'строка {number}\n' for number in range(100)),
+            content_type='text/plain'
+        )
+        response = CompressionMiddleware().process_response(request, response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertTrue(body.decode().endswith('строка 99\n'))
+
+    def test_pages_with_csrf_token_are_not_compressed(self):
+        response = self.client.get(
+            reverse('users:login'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_collectstatic_writes_compressed_copies(self):
+        with tempfile.TemporaryDirectory() as source, \
+                tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(source, 'site.css'), 'w') as file:
+                file.write('body { color: black; }\n' * 100)
+            with override_settings(
+                STATICFILES_DIRS=[source],
+                STATIC_ROOT=root,
+                STATICFILES_FINDERS=[
+                    'django.contrib.staticfiles.finders.FileSystemFinder'
+                ],
+                STATICFILES_STORAGE=(
+                    'core.storage.CompressedManifestStaticFilesStorage'
+                ),
+            ):
+                call_command('collectstatic', interactive=False, verbosity=0)
+                name = staticfiles_storage.stored_name('site.css')
+                self.assertTrue(
+                    os.path.isfile(os.path.join(root, name + '.gz'))
+                )
+                request = RequestFactory().get(
+                    '/static/' + name, HTTP_ACCEPT_ENCODING='gzip'
+                )
+                response = serve_static(request, name)
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertEqual(response['Content-Type'], 'text/css')
+                self.assertIn('immutable', response['Cache-Control'])
+                body = gzip.decompress(b''.join(response.streaming_content))
+                self.assertTrue(body.startswith(b'body'))
+                response = serve_static(RequestFactory().get('/'), name)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+
+def echo_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    yield environ['REQUEST_METHOD'].encode()
+    yield environ['wsgi.input'].read()
+    yield environ.get('HTTP_X_TRACE', '').encode()
+
+
+def endless_app(environ, start_response):
+    """Поток, который отдаёт части, пока клиент не уйдёт."""
+    start_response('200 OK', [('Content-Type', 'text/event-stream')])
+    try:
+        while True:
+            yield b'.'
+            environ[DISCONNECTED].wait(0.01)
+    finally:
+        endless_app.closed.set()
+
+
+class AsgiAdapterTests(SimpleTestCase):
+    def call(self, application, scope, body=b''):
+        messages = []
+        requests = [
+            {'type': 'http.request', 'body': body[:2], 'more_body': True},
+            {'type': 'http.request', 'body': body[2:]},
+        ]
+
+        async def receive():
+            if requests:
+                return requests.pop(0)
+            # Как и сервер, сообщает об уходе клиента после ответа.
+            await asyncio.sleep(1)
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(application(scope, receive, send))
+        application.executor.shutdown()
+        return messages
+
+    def scope(self, path, method='GET', headers=()):
+        return {
+            'type': 'http', 'method': method, 'path': path,
+            'query_string': b'', 'headers': list(headers),
+        }
+
+    def test_request_and_chunks_pass_through(self):
+        application = WsgiToAsgi(echo_app, max_workers=1)
+        messages = self.call(
+            application,
+            self.scope('/', 'POST', [(b'x-trace', b'42')]),
+            body=b'hello',
+        )
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertIn((b'content-type', b'text/plain'), messages[0]['headers'])
+        self.assertEqual(
+            [message['body'] for message in messages[1:]],
+            [b'POST', b'hello', b'42', b'']
+        )
+        self.assertFalse(messages[-1].get('more_body'))
+
+    def test_disconnect_releases_worker(self):
+        """Уход клиента посреди потока освобождает поток пула."""
+        endless_app.closed = threading.Event()
+        application = WsgiToAsgi(endless_app, max_workers=1)
+        sent = []
+        requests = [{'type': 'http.request', 'body': b''}]
+
+        async def receive():
+            if requests:
+                return requests.pop(0)
+            await asyncio.sleep(0.05)
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            # Как uvicorn: запись в закрытое соединение молча теряется.
+            sent.append(message)
+
+        asyncio.run(asyncio.wait_for(
+            application(self.scope('/'), receive, send), timeout=5
+        ))
+        self.assertTrue(endless_app.closed.is_set())
+        self.assertEqual(sent[0]['status'], 200)
+        application.executor.shutdown()
+
+    def test_django_page(self):
+        application = WsgiToAsgi(get_wsgi_application(), max_workers=2)
+        messages = self.call(application, self.scope('/about/author/'))
+        self.assertEqual(messages[0]['status'], 200)
+        body = b''.join(message.get('body', b'') for message in messages)
+        self.assertIn('Об авторе', body.decode())
+
+
+class ImportProfileTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   posts.models\n'
+            'import time:      3750 |       3870 | posts.views\n'
+            'Traceback: не строка профиля\n'
+        )
+        self.assertEqual(
+            parse_importtime(output),
+            {'posts.models': 120, 'posts.views': 3750}
+        )
+
+
+@query_budget(1)
+def two_queries(request):
+    User.objects.count()
+    User.objects.exists()
+    return HttpResponse()
+
+
+@query_budget(1)
+def streaming_queries(request):
+    return StreamingHttpResponse(
+        str(User.objects.count()) for _ in range(2)
+    )
+
+
+class QueryBudgetTests(TestCase):
+    def test_every_view_has_budget(self):
+        """У каждого представления posts, users и about объявлен бюджет."""
+        modules = ('posts.views', 'users.views', 'about.views')
+        checked = 0
+        for namespace in ('posts', 'users', 'about'):
+            resolver = get_resolver().namespace_dict[namespace][1]
+            for pattern in resolver.url_patterns:
+                view = pattern.callback
+                if view.__module__ not in modules:
+                    continue
+                if hasattr(view, 'view_class'):
+                    view = view.view_class.dispatch
+                self.assertTrue(
+                    hasattr(view, 'query_budget'), pattern.name
+                )
+                checked += 1
+        self.assertGreater(checked, 20)
+
+    def test_exceeded_budget(self):
+        request = RequestFactory().get('/')
+        with enforce_budgets(), self.assertRaises(QueryBudgetExceeded):
+            two_queries(request)
+        with override_settings(QUERY_BUDGET_ACTION='log'):
+            with self.assertLogs('core.querybudget', 'WARNING'):
+                two_queries(request)
+        with override_settings(QUERY_BUDGET_ACTION=None):
+            self.assertFalse(hasattr(two_queries(request), 'query_usage'))
+
+    def test_streaming_content_is_counted(self):
+        with enforce_budgets():
+            response = streaming_queries(RequestFactory().get('/'))
+            with self.assertRaises(QueryBudgetExceeded):
+                list(response.streaming_content)
+
+    def test_assert_max_queries(self):
+        with assert_max_queries(1) as usage:
+            User.objects.count()
+        self.assertEqual(len(usage.queries), 1)
+        with self.assertRaises(QueryBudgetExceeded):
+            with assert_max_queries(0):
+                User.objects.count()
+
+
+class SlowQueryTests(TestCase):
+    def test_normalize(self):
+        """Отпечаток не зависит от значений и длины списка IN."""
+        self.assertEqual(
+            slowqueries.normalize(
+                "SELECT * FROM t WHERE a = 'x''y' AND b IN (1, 2,  3)"
+            ),
+            'SELECT * FROM t WHERE a = ? AND b IN (...)'
+        )
+        self.assertEqual(
+            slowqueries.normalize('SELECT "t"."id" FROM t2 LIMIT %s'),
+            'SELECT "t"."id" FROM t2 LIMIT ?'
+        )
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_queries_are_logged_with_plan(self):
+        cache.clear()
+        log = slowqueries.SlowQueryLog()
+        with mock.patch.object(slowqueries, 'log', log), \
+                mock.patch.object(log, 'ensure_flusher'):
+            self.client.get(reverse('posts:index'))
+            self.assertGreater(log.flush(), 0)
+        query = SlowQuery.objects.filter(
+            view='posts:index', sql__contains='"posts_post"'
+        ).first()
+        self.assertIsNotNone(query)
+        self.assertTrue(query.plan)
+        self.assertNotIn('%s', query.sql)
+
+        out = StringIO()
+        call_command('slow_queries', stdout=out)
+        self.assertIn(query.sql, out.getvalue())
+
+
+def profiled_view(request):
+    profiler.sampler.sample()
+    return HttpResponse('ok')
+
+
+class ProfilerTests(SimpleTestCase):
+    def setUp(self):
+        self.sampler = profiler.Sampler()
+        mock.patch.object(profiler, 'sampler', self.sampler).start()
+        mock.patch.object(self.sampler, 'ensure_sampler').start()
+        self.addCleanup(mock.patch.stopall)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @override_settings(PROFILER_RATE=1)
+    def test_stacks_are_collected_per_view(self):
+        """Стек начинается с middleware и кончается в представлении."""
+        request = RequestFactory().get('/')
+        request.resolver_match = mock.Mock(view_name='posts:index')
+        response = profiler.ProfilerMiddleware(profiled_view)(request)
+        self.assertEqual(response.content, b'ok')
+        (stack, samples), = self.sampler.stacks['posts:index'].items()
+        self.assertEqual(samples, 1)
+        frames = stack.split(';')
+        self.assertEqual(
+            frames[0], 'core.profiler:ProfilerMiddleware.__call__'
+        )
+        self.assertIn('core.tests:profiled_view', frames)
+        self.assertEqual(frames[-1], 'core.profiler:Sampler.sample')
+
+    def test_finished_request_is_not_sampled(self):
+        """Стек, снятый до конца запроса, не попадает в отданные счётчики."""
+        counts = Counter()
+
+        def finish(*args):
+            self.sampler.threads.clear()
+            return 'a;b'
+
+        with self.sampler.track(counts), \
+                mock.patch.object(profiler, 'collapse', side_effect=finish):
+            self.sampler.sample()
+        self.assertFalse(counts)
+        with self.sampler.track(counts):
+            self.sampler.sample()
+        self.assertEqual(sum(counts.values()), 1)
+
+    @override_settings(PROFILER_RATE=0)
+    def test_disabled(self):
+        profiler.ProfilerMiddleware(profiled_view)(RequestFactory().get('/'))
+        self.assertFalse(self.sampler.stacks)
+
+    def test_flush_and_export(self):
+        """Сброс дописывает файл процесса, команда сливает файлы."""
+        self.sampler.add('posts:index', {'a;b': 2, 'a;c': 1})
+        self.sampler.flush(self.directory)
+        self.sampler.add('posts:index', {'a;b': 1})
+        self.sampler.flush(self.directory)
+        profiler.write(
+            os.path.join(self.directory, 'posts.index', '1.folded'),
+            {'a;c': 4},
+        )
+        out = StringIO()
+        with override_settings(PROFILER_DIR=self.directory):
+            call_command('flamegraph', 'posts:index', stdout=out)
+            self.assertEqual(out.getvalue(), 'a;b 3\na;c 5\n')
+            out = StringIO()
+            call_command('flamegraph', stdout=out)
+            self.assertIn('8  posts.index', out.getvalue())
+            out = StringIO()
+            call_command(
+                'flamegraph', 'posts:index', top=1, clear=True, stdout=out
+            )
+            self.assertEqual(out.getvalue().split()[-1], 'c')
+            self.assertFalse(os.listdir(self.directory))
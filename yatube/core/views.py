@@ -1,4 +1,16 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.static import serve
+
+from .compression import SUFFIXES, available_encodings, choose_encoding
+
+# Файлы с хешем в имени не меняются, поэтому кэшируются на год.
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
 
 
 def page_not_found(request, exception):
@@ -15,3 +27,27 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=""):
     return render(request, "core/403csrf.html")
+
+
+def serve_static(request, path):
+    """Отдаёт собранную статику, выбирая предсжатый вариант файла."""
+    root = settings.STATIC_ROOT
+    encodings = [
+        encoding for encoding in available_encodings()
+        if os.path.isfile(os.path.join(root, path + SUFFIXES[encoding]))
+    ]
+    encoding = choose_encoding(request, encodings)
+    suffix = SUFFIXES[encoding] if encoding else ''
+    response = serve(request, path + suffix, document_root=root)
+    if encoding:
+        response['Content-Type'] = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+        response['Content-Encoding'] = encoding
+    if encodings:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    if path in getattr(staticfiles_storage, 'hashed_names', ()):
+        patch_cache_control(
+            response, public=True, max_age=STATIC_MAX_AGE, immutable=True
+        )
+    return response
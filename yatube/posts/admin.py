@@ -1,15 +1,137 @@
+from django import forms
 from django.contrib import admin
-from .models import Post
+from django.contrib.admin import helpers
+from django.contrib.auth import get_permission_codename, get_user_model
+from django.shortcuts import render
+from .models import AdminJob, Post
 from .models import Group
+from .paginate import EstimatedCountPaginator
+from . import jobs, search
+
+User = get_user_model()
+
+
+class ReassignGroupForm(forms.Form):
+    group = forms.ModelChoiceField(Group.objects.all(), label='Группа')
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('reassign_group', 'delete_posts', 'purge_images',
+               'ban_authors')
+
+    def get_search_results(self, request, queryset, search_term):
+        return search.search(queryset, search_term), False
+
+    def get_actions(self, request):
+        # Синхронное удаление заменено фоновой задачей delete_posts.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def has_ban_permission(self, request):
+        """Блокировка меняет пользователей и удаляет их посты."""
+        opts = User._meta
+        codename = get_permission_codename('change', opts)
+        return (
+            request.user.has_perm(f'{opts.app_label}.{codename}')
+            and self.has_delete_permission(request)
+        )
+
+    def _enqueue(self, request, action, ids, params=None):
+        job = jobs.enqueue(action, ids, params, request.user)
+        self.message_user(
+            request,
+            f'{job} поставлена в очередь: {job.total} объектов. '
+            f'Прогресс — в разделе «Фоновые задачи».'
+        )
+
+    def reassign_group(self, request, queryset):
+        form = ReassignGroupForm(
+            request.POST if 'apply' in request.POST else None
+        )
+        if form.is_valid():
+            self._enqueue(
+                request,
+                AdminJob.REASSIGN_GROUP,
+                queryset.values_list('pk', flat=True),
+                {'group_id': form.cleaned_data['group'].pk},
+            )
+            return None
+        return render(request, 'admin/posts/reassign_group.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Перенос постов в группу',
+            'opts': self.model._meta,
+            'form': form,
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'count': queryset.count(),
+        })
+    reassign_group.short_description = 'Перенести в группу (в фоне)'
+    reassign_group.allowed_permissions = ('change',)
+
+    def delete_posts(self, request, queryset):
+        self._enqueue(
+            request,
+            AdminJob.DELETE_POSTS,
+            queryset.values_list('pk', flat=True)
+        )
+    delete_posts.short_description = 'Удалить посты (в фоне)'
+    delete_posts.allowed_permissions = ('delete',)
+
+    def purge_images(self, request, queryset):
+        self._enqueue(
+            request,
+            AdminJob.PURGE_IMAGES,
+            queryset.exclude(image='').values_list('pk', flat=True)
+        )
+    purge_images.short_description = 'Удалить картинки (в фоне)'
+    purge_images.allowed_permissions = ('change',)
+
+    def ban_authors(self, request, queryset):
+        self._enqueue(
+            request,
+            AdminJob.BAN_AUTHORS,
+            queryset.values_list('author', flat=True).distinct()
+        )
+    ban_authors.short_description = (
+        'Заблокировать авторов и удалить их записи (в фоне)'
+    )
+    ban_authors.allowed_permissions = ('ban',)
+
+
+class GroupAdmin(admin.ModelAdmin):
+    search_fields = ('title', 'slug')
+
+
+class AdminJobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'action', 'status', 'progress', 'created_by',
+                    'created', 'finished')
+    list_filter = ('status', 'action')
+    readonly_fields = ('action', 'status', 'total', 'processed', 'error',
+                       'created_by', 'created', 'finished', 'params')
+    exclude = ('target_ids',)
+
+    def progress(self, job):
+        if not job.total:
+            return '—'
+        percent = job.processed * 100 // job.total
+        return f'{job.processed} из {job.total} ({percent}%)'
+    progress.short_description = 'Прогресс'
+
+    def has_add_permission(self, request):
+        return False
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(AdminJob, AdminJobAdmin)
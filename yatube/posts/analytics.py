@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from core.hyperloglog import HyperLogLog
+
+from . import counters, versions
+from .models import Post, PostReferrer, PostViewStats
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 10
+# Пар пост-день в буфере: id поста приходит от клиента, и без предела
+# перебор несуществующих id раздувал бы память до сброса.
+MAX_ENTRIES = 10000
+# Сайтов-источников на пост за день в буфере; остальные — OTHER_HOST.
+MAX_REFERRERS = 20
+OTHER_HOST = '*'
+SUMMARY_DAYS = 30
+
+
+class Entry:
+    """Накопленные в памяти просмотры одного поста за один день."""
+
+    def __init__(self):
+        self.views = 0
+        self.sketch = HyperLogLog()
+        self.referrers = Counter()
+
+
+def referrer_host(url):
+    """Сайт, с которого пришёл зритель; пустая строка — прямой заход."""
+    return (urlsplit(url or '').hostname or '')[:255]
+
+
+class ViewBuffer:
+    """Буфер просмотров процесса, сбрасываемый в базу пачками.
+
+    Запрос только обновляет словарь в памяти; раз в FLUSH_INTERVAL
+    секунд фоновый поток пишет накопленное — по строке на пост
+    и день. Просмотры последнего интервала теряются при аварийном
+    завершении процесса: для статистики это допустимо. Когда в буфере
+    MAX_ENTRIES пар, просмотры новых пар до сброса отбрасываются.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = defaultdict(Entry)
+        self.dropped = 0
+        self.thread = None
+
+    def record(self, post_id, viewer, referrer='', day=None):
+        """Учитывает просмотр; False, если буфер полон и он отброшен."""
+        day = day or timezone.localdate()
+        host = referrer_host(referrer)
+        with self.lock:
+            key = post_id, day
+            if key not in self.entries and len(self.entries) >= MAX_ENTRIES:
+                self.dropped += 1
+                return False
+            entry = self.entries[key]
+            entry.views += 1
+            entry.sketch.add(viewer)
+            if (
+                host not in entry.referrers
+                and len(entry.referrers) >= MAX_REFERRERS
+            ):
+                host = OTHER_HOST
+            entry.referrers[host] += 1
+        self.ensure_flusher()
+        return True
+
+    def ensure_flusher(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, name='view-buffer', daemon=True
+                )
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            with self.lock:
+                if not self.entries:
+                    self.thread = None
+                    break
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.exception('Не удалось записать просмотры')
+                connection.close()
+        connection.close()
+
+    def flush(self):
+        """Пишет накопленное в базу; возвращает число просмотров."""
+        with self.lock:
+            entries, self.entries = self.entries, defaultdict(Entry)
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            logger.warning(
+                'Буфер просмотров был полон, отброшено: %d', dropped
+            )
+        if not entries:
+            return 0
+        _write(entries)
+        return sum(entry.views for entry in entries.values())
+
+
+def _write(entries):
+    authors = dict(Post.objects.filter(
+        pk__in={post_id for post_id, _ in entries}
+    ).values_list('pk', 'author'))
+    entries = {
+        key: entry for key, entry in entries.items() if key[0] in authors
+    }
+    with transaction.atomic():
+        PostViewStats.objects.bulk_create([
+            PostViewStats(post_id=post_id, day=day)
+            for post_id, day in entries
+        ], ignore_conflicts=True)
+        rows = PostViewStats.objects.select_for_update().filter(
+            post__in={post_id for post_id, _ in entries},
+            day__in={day for _, day in entries},
+        )
+        for row in rows:
+            entry = entries.get((row.post_id, row.day))
+            if entry is None:
+                continue
+            sketch = HyperLogLog.from_bytes(row.sketch)
+            sketch.merge(entry.sketch)
+            PostViewStats.objects.filter(pk=row.pk).update(
+                views=F('views') + entry.views, sketch=sketch.to_bytes()
+            )
+        referrers = {
+            (post_id, day, host): views
+            for (post_id, day), entry in entries.items()
+            for host, views in entry.referrers.items()
+        }
+        PostReferrer.objects.bulk_create([
+            PostReferrer(post_id=post_id, day=day, host=host)
+            for post_id, day, host in referrers
+        ], ignore_conflicts=True)
+        for (post_id, day, host), views in referrers.items():
+            PostReferrer.objects.filter(
+                post=post_id, day=day, host=host
+            ).update(views=F('views') + views)
+    views = Counter()
+    for (post_id, _), entry in entries.items():
+        views[post_id] += entry.views
+    for post_id, count in views.items():
+        counters.increment(counters.VIEWS, post_id, count)
+    versions.bump(*{f'author:{authors[post_id]}' for post_id in views})
+
+
+def author_summary(author, days=SUMMARY_DAYS):
+    """Просмотры постов автора за days дней: по дням, итоги и источники."""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    rows = PostViewStats.objects.filter(
+        post__author=author, day__gte=since
+    ).values_list('day', 'views', 'sketch')
+    by_day = defaultdict(lambda: [0, HyperLogLog()])
+    total = HyperLogLog()
+    for day, views, sketch in rows:
+        sketch = HyperLogLog.from_bytes(sketch)
+        by_day[day][0] += views
+        by_day[day][1].merge(sketch)
+        total.merge(sketch)
+    return {
+        'days': [
+            {'day': day, 'views': views, 'unique': sketch.count()}
+            for day, (views, sketch) in sorted(by_day.items(), reverse=True)
+        ],
+        'views': sum(views for views, _ in by_day.values()),
+        'unique': total.count(),
+        'referrers': PostReferrer.objects.filter(
+            post__author=author, day__gte=since
+        ).exclude(host='').values('host').annotate(
+            total=Sum('views')
+        ).order_by('-total')[:10],
+    }
+
+
+buffer = ViewBuffer()
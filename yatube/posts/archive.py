@@ -0,0 +1,84 @@
+import datetime
+from collections import Counter
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ArchiveMonth, Post
+
+
+def month_of(moment):
+    """Первое число месяца, к которому относится момент."""
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def month_range(year, month):
+    """Начало месяца и начало следующего; None для неверной даты."""
+    try:
+        start = datetime.datetime(year, month, 1)
+        end = datetime.datetime(year + month // 12, month % 12 + 1, 1)
+    except (ValueError, OverflowError):
+        # Год из URL может не уместиться даже в целое C.
+        return None
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def keys(author_id, group_id):
+    result = [f'author:{author_id}']
+    if group_id:
+        result.append(f'group:{group_id}')
+    return result
+
+
+def add_post(author_id, group_id, pub_date, amount=1):
+    """Учитывает пост (amount=-1 — его удаление) в архивах месяца."""
+    month = month_of(pub_date)
+    post_keys = keys(author_id, group_id)
+    if amount > 0:
+        ArchiveMonth.objects.bulk_create([
+            ArchiveMonth(key=key, month=month) for key in post_keys
+        ], ignore_conflicts=True)
+    ArchiveMonth.objects.filter(
+        key__in=post_keys, month=month, post_count__gte=-amount
+    ).update(post_count=F('post_count') + amount)
+
+
+def remove_post(author_id, group_id, pub_date):
+    add_post(author_id, group_id, pub_date, -1)
+
+
+def years(key):
+    """Месяцы с постами, сгруппированные по годам, новые первыми."""
+    months = ArchiveMonth.objects.filter(key=key, post_count__gt=0)
+    return [
+        (year, list(rows))
+        for year, rows in groupby(months, key=lambda row: row.month.year)
+    ]
+
+
+def neighbours(key, month):
+    """Ближайшие непустые месяцы до и после month."""
+    months = ArchiveMonth.objects.filter(key=key, post_count__gt=0)
+    return (
+        months.filter(month__lt=month).first(),
+        months.filter(month__gt=month).order_by('month').first(),
+    )
+
+
+@transaction.atomic
+def rebuild():
+    """Пересчитывает архив по таблице постов."""
+    counts = Counter()
+    posts = Post.objects.order_by().values_list(
+        'author', 'group', 'pub_date'
+    )
+    for author_id, group_id, pub_date in posts.iterator():
+        for key in keys(author_id, group_id):
+            counts[key, month_of(pub_date)] += 1
+    ArchiveMonth.objects.all().delete()
+    ArchiveMonth.objects.bulk_create(
+        ArchiveMonth(key=key, month=month, post_count=count)
+        for (key, month), count in counts.items()
+    )
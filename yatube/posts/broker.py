@@ -0,0 +1,203 @@
+import json
+import logging
+import queue
+import threading
+import time
+
+from django.db import DatabaseError, connection
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import FeedEvent
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1
+# Сколько событий может ждать медленного клиента; дальше — сброс.
+MAX_PENDING = 100
+# Сколько хранить журнал: этого хватает на переподключение клиента.
+RETENTION = 60 * 60
+PRUNE_EVERY = 60
+RESET = 'reset'
+HEARTBEAT = 15
+# Соединение закрывается через LIFETIME секунд, и браузер сам
+# переподключается с Last-Event-ID: поток воркера не занят навечно.
+LIFETIME = 5 * 60
+RECONNECT_MS = 3000
+# Через столько секунд повторить подключение, если мест нет.
+BUSY_RETRY = 60
+
+
+def channels(author_id, group_id):
+    """Каналы, в которые попадает новый пост."""
+    result = {'index', f'author:{author_id}'}
+    if group_id:
+        result.add(f'group:{group_id}')
+    return result
+
+
+def publish(post):
+    FeedEvent.objects.create(
+        post_id=post.pk, author_id=post.author_id, group_id=post.group_id
+    )
+
+
+class Subscription:
+    """Очередь событий одного соединения с ограниченным размером.
+
+    Если клиент не успевает читать, очередь очищается и вместо
+    пропущенных событий он получает RESET: память на соединение
+    не растёт, а клиент просто перезагружает ленту.
+    """
+
+    def __init__(self, channels, max_pending=MAX_PENDING):
+        self.channels = frozenset(channels)
+        self.events = queue.Queue(max_pending)
+
+    def put(self, event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            with self.events.mutex:
+                self.events.queue.clear()
+            self.events.put_nowait(RESET)
+
+    def get(self, timeout):
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Broker:
+    """Раздаёт события журнала подписчикам текущего процесса.
+
+    Журнал читает один фоновый поток на процесс, сколько бы
+    соединений ни было открыто; поток запускается с первой
+    подпиской и завершается, когда подписчиков не остаётся.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+        self.last_id = None
+        self.pruned = 0
+        self.thread = None
+
+    def subscribe(self, channels, limit=None):
+        """Новая подписка; None, если подписок уже limit."""
+        subscription = Subscription(channels)
+        with self.lock:
+            if limit is not None and len(self.subscriptions) >= limit:
+                return None
+            if self.last_id is None:
+                self.last_id = latest_id()
+            self.subscriptions.add(subscription)
+        self.ensure_pump()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def ensure_pump(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._pump, name='feed-broker', daemon=True
+                )
+                self.thread.start()
+
+    def _pump(self):
+        while True:
+            time.sleep(POLL_INTERVAL)
+            with self.lock:
+                if not self.subscriptions:
+                    self.thread = None
+                    self.last_id = None
+                    break
+            try:
+                self.poll()
+            except DatabaseError:
+                logger.exception('Не удалось прочитать журнал лент')
+                connection.close()
+        connection.close()
+
+    def poll(self):
+        """Читает новые записи журнала и раздаёт их подписчикам."""
+        events = list(
+            FeedEvent.objects.filter(pk__gt=self.last_id or 0).order_by('pk')
+        )
+        with self.lock:
+            for event in events:
+                event_channels = channels(event.author_id, event.group_id)
+                for subscription in self.subscriptions:
+                    if subscription.channels & event_channels:
+                        subscription.put(event)
+            if events:
+                self.last_id = events[-1].pk
+        if time.monotonic() - self.pruned > PRUNE_EVERY:
+            self.pruned = time.monotonic()
+            FeedEvent.objects.filter(
+                created__lt=timezone.now()
+                - timezone.timedelta(seconds=RETENTION)
+            ).delete()
+
+
+def latest_id():
+    return FeedEvent.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+def replay(channel_set, after, limit=MAX_PENDING):
+    """События после after для клиента, переподключившегося с Last-Event-ID."""
+    events = FeedEvent.objects.filter(pk__gt=after).order_by('pk')[:limit]
+    return [
+        event for event in events
+        if channels(event.author_id, event.group_id) & channel_set
+    ]
+
+
+def _message(event):
+    if event == RESET:
+        return 'event: reset\ndata: {}\n\n'
+    data = json.dumps({'id': event.post_id})
+    return f'id: {event.pk}\nevent: post\ndata: {data}\n\n'
+
+
+class EventStream:
+    """Сообщения SSE о новых постах для подписки.
+
+    Пропущенное за время переподключения досылается из журнала,
+    в паузах отправляется комментарий-пульс, чтобы прокси
+    не закрывали соединение. Подписка снимается при закрытии
+    ответа, даже если отдача так и не началась.
+    """
+
+    def __init__(self, subscription, last_event_id=None, lifetime=LIFETIME):
+        self.subscription = subscription
+        self.messages = self._messages(last_event_id, lifetime)
+
+    def __iter__(self):
+        return self.messages
+
+    def close(self):
+        self.messages.close()
+        broker.unsubscribe(self.subscription)
+
+    def _messages(self, last_event_id, lifetime):
+        yield f'retry: {RECONNECT_MS}\n\n'
+        last_id = 0
+        if last_event_id is not None:
+            for event in replay(self.subscription.channels, last_event_id):
+                last_id = event.pk
+                yield _message(event)
+        deadline = time.monotonic() + lifetime
+        while time.monotonic() < deadline:
+            event = self.subscription.get(timeout=HEARTBEAT)
+            if event is None:
+                yield ': heartbeat\n\n'
+            elif event == RESET or event.pk > last_id:
+                yield _message(event)
+
+
+broker = Broker()
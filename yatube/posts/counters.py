@@ -0,0 +1,128 @@
+import random
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import CounterShard
+
+VIEWS = 'views'
+COMMENTS = 'comments'
+SHARDS = 8
+CACHE_TIMEOUT = 60
+
+
+def _cache_key(name, object_id):
+    return f'counter:{name}:{object_id}'
+
+
+def increment(name, object_id, amount=1):
+    """Прибавляет amount к счётчику, меняя одну случайную часть."""
+    shard = random.randrange(SHARDS)
+    rows = CounterShard.objects.filter(
+        name=name, object_id=object_id, shard=shard
+    )
+    if not rows.update(count=F('count') + amount):
+        CounterShard.objects.bulk_create([CounterShard(
+            name=name, object_id=object_id, shard=shard
+        )], ignore_conflicts=True)
+        rows.update(count=F('count') + amount)
+
+
+def invalidate(name, object_id):
+    """Сбрасывает кэш суммы, чтобы новое значение попало в ленты сразу.
+
+    Нужен там, где вместе со счётчиком меняется версия ленты: иначе
+    свежий ETag достался бы странице со старой суммой.
+    """
+    cache.delete(_cache_key(name, object_id))
+
+
+def drop(object_id, names=(VIEWS, COMMENTS)):
+    """Удаляет счётчики удалённого объекта вместе с кэшем сумм."""
+    CounterShard.objects.filter(
+        name__in=names, object_id=object_id
+    ).delete()
+    cache.delete_many([_cache_key(name, object_id) for name in names])
+
+
+def get_many(name, object_ids):
+    """Значения счётчиков для набора объектов: {object_id: count}.
+
+    Сумма частей кэшируется на CACHE_TIMEOUT секунд и увеличениями
+    не сбрасывается: популярный объект пересчитывается раз в период,
+    а страница с ним до того отдаётся одинаковой всем зрителям.
+    """
+    keys = {_cache_key(name, object_id): object_id for object_id in object_ids}
+    counts = {
+        keys[key]: value for key, value in cache.get_many(keys).items()
+    }
+    missing = [
+        object_id for object_id in keys.values() if object_id not in counts
+    ]
+    if missing:
+        loaded = dict.fromkeys(missing, 0)
+        loaded.update(
+            CounterShard.objects.filter(name=name, object_id__in=missing)
+            .values('object_id').annotate(total=Sum('count'))
+            .values_list('object_id', 'total')
+        )
+        cache.set_many({
+            _cache_key(name, object_id): value
+            for object_id, value in loaded.items()
+        }, CACHE_TIMEOUT)
+        counts.update(loaded)
+    return counts
+
+
+def get(name, object_id):
+    return get_many(name, [object_id])[object_id]
+
+
+def attach(objects, name, attr):
+    """Записывает значения счётчика name в атрибут attr объектов."""
+    counts = get_many(name, [obj.pk for obj in objects])
+    for obj in objects:
+        setattr(obj, attr, counts[obj.pk])
+
+
+def compact(name=None):
+    """Сводит части каждого счётчика в нулевую; возвращает их число.
+
+    Из частей вычитается ровно то, что было прочитано, поэтому
+    увеличения, пришедшие во время сжатия, не теряются. Пустые
+    части удаляются, и чтение суммирует меньше строк.
+    """
+    shards = CounterShard.objects.filter(shard__gt=0).exclude(count=0)
+    if name is not None:
+        shards = shards.filter(name=name)
+    moved = defaultdict(int)
+    with transaction.atomic():
+        for pk, shard_name, object_id, count in shards.values_list(
+            'pk', 'name', 'object_id', 'count'
+        ):
+            CounterShard.objects.filter(pk=pk).update(
+                count=F('count') - count
+            )
+            moved[shard_name, object_id] += count
+        for (shard_name, object_id), count in moved.items():
+            CounterShard.objects.bulk_create([CounterShard(
+                name=shard_name, object_id=object_id, shard=0
+            )], ignore_conflicts=True)
+            CounterShard.objects.filter(
+                name=shard_name, object_id=object_id, shard=0
+            ).update(count=F('count') + count)
+        CounterShard.objects.filter(shard__gt=0, count=0).delete()
+    return len(moved)
+
+
+@transaction.atomic
+def reset(name, counts):
+    """Заменяет значения счётчиков name значениями из {object_id: count}."""
+    CounterShard.objects.filter(name=name).delete()
+    CounterShard.objects.bulk_create(
+        CounterShard(name=name, object_id=object_id, shard=0, count=count)
+        for object_id, count in counts.items()
+    )
+    cache.delete_many([_cache_key(name, object_id) for object_id in counts])
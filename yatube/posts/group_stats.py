@@ -0,0 +1,115 @@
+from django.db.models import Count, DateTimeField, F, Max, Value
+from django.db.models import prefetch_related_objects
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Group, GroupAuthorStats, GroupStats, Post
+
+TOP_AUTHORS = 3
+
+
+def create_group_stats(group):
+    """Заводит пустую строку статистики для новой группы."""
+    GroupStats.objects.get_or_create(
+        group=group, defaults={'last_activity': timezone.now()}
+    )
+
+
+def add_post(group_id, author_id, pub_date):
+    """Учитывает появление поста в группе."""
+    if group_id is None:
+        return
+    stats, created = GroupStats.objects.get_or_create(
+        group_id=group_id,
+        defaults={'post_count': 1, 'last_activity': pub_date}
+    )
+    if not created:
+        GroupStats.objects.filter(group_id=group_id).update(
+            post_count=F('post_count') + 1,
+            last_activity=Greatest(
+                'last_activity', Value(pub_date, output_field=DateTimeField())
+            ),
+        )
+    author_stats, created = GroupAuthorStats.objects.get_or_create(
+        group_id=group_id, author_id=author_id, defaults={'post_count': 1}
+    )
+    if not created:
+        GroupAuthorStats.objects.filter(pk=author_stats.pk).update(
+            post_count=F('post_count') + 1
+        )
+
+
+def remove_post(group_id, author_id):
+    """Учитывает удаление поста из группы.
+
+    Время последней активности не уменьшается: удаление поста
+    не отменяет того, что в группе писали.
+    """
+    if group_id is None:
+        return
+    GroupStats.objects.filter(group_id=group_id, post_count__gt=0).update(
+        post_count=F('post_count') - 1
+    )
+    GroupAuthorStats.objects.filter(
+        group_id=group_id, author_id=author_id, post_count__gt=0
+    ).update(post_count=F('post_count') - 1)
+
+
+def rebuild():
+    """Полностью пересчитывает статистику по таблице постов."""
+    GroupStats.objects.all().delete()
+    GroupAuthorStats.objects.all().delete()
+    now = timezone.now()
+    per_group = {
+        row['group']: row
+        for row in Post.objects.filter(group__isnull=False)
+        .values('group')
+        .annotate(post_count=Count('pk'), last_activity=Max('pub_date'))
+    }
+    GroupStats.objects.bulk_create(
+        GroupStats(
+            group_id=group_id,
+            post_count=per_group.get(group_id, {}).get('post_count', 0),
+            last_activity=per_group.get(group_id, {}).get(
+                'last_activity', now
+            ),
+        )
+        for group_id in Group.objects.values_list('pk', flat=True)
+    )
+    GroupAuthorStats.objects.bulk_create(
+        GroupAuthorStats(
+            group_id=row['group'],
+            author_id=row['author'],
+            post_count=row['post_count'],
+        )
+        for row in Post.objects.filter(group__isnull=False)
+        .values('group', 'author')
+        .annotate(post_count=Count('pk'))
+    )
+
+
+def top_authors(group_ids, limit=TOP_AUTHORS):
+    """Возвращает словарь group_id -> список самых активных авторов.
+
+    Первые места во всех группах выбираются одним запросом
+    с оконной функцией по индексу (group, -post_count).
+    """
+    result = {group_id: [] for group_id in group_ids}
+    if not result:
+        return result
+    table = GroupAuthorStats._meta.db_table
+    placeholders = ', '.join(['%s'] * len(result))
+    rows = list(GroupAuthorStats.objects.raw(
+        f'SELECT * FROM ('
+        f'SELECT s.*, ROW_NUMBER() OVER ('
+        f'PARTITION BY s.group_id ORDER BY s.post_count DESC, s.author_id'
+        f') AS position FROM {table} s '
+        f'WHERE s.group_id IN ({placeholders}) AND s.post_count > 0'
+        f') ranked WHERE ranked.position <= %s '
+        f'ORDER BY ranked.group_id, ranked.position',
+        [*result, limit]
+    ))
+    prefetch_related_objects(rows, 'author')
+    for row in rows:
+        result[row.group_id].append(row)
+    return result
@@ -0,0 +1,133 @@
+import json
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AdminJob, Comment, Post, User
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 200
+AUTHORS_PER_CHUNK = 1
+
+
+def enqueue(action, target_ids, params=None, user=None):
+    """Ставит массовую операцию в очередь, не выполняя её в запросе."""
+    target_ids = sorted(set(target_ids))
+    return AdminJob.objects.create(
+        action=action,
+        target_ids=json.dumps(target_ids),
+        params=json.dumps(params or {}),
+        total=len(target_ids),
+        created_by=user if user and user.is_authenticated else None,
+    )
+
+
+@transaction.atomic
+def _reassign_group(ids, params):
+    # Посты сохраняются по одному, чтобы сработали сигналы
+    # и обновились агрегаты вроде статистики групп.
+    for post in Post.objects.filter(pk__in=ids):
+        post.group_id = params['group_id']
+        post.save(update_fields=['group'])
+
+
+@transaction.atomic
+def _delete_posts(ids, params):
+    Post.objects.filter(pk__in=ids).delete()
+
+
+def _purge_images(ids, params):
+    posts = list(Post.objects.filter(pk__in=ids).exclude(image=''))
+    Post.objects.filter(pk__in=[post.pk for post in posts]).update(image='')
+    for post in posts:
+        post.image.delete(save=False)
+
+
+def _ban_authors(ids, params):
+    """Блокирует авторов и удаляет их посты и комментарии частями."""
+    User.objects.filter(pk__in=ids).update(is_active=False)
+    for model in (Post, Comment):
+        while True:
+            chunk = list(
+                model.objects.filter(author__in=ids)
+                .values_list('pk', flat=True)[:CHUNK_SIZE]
+            )
+            if not chunk:
+                break
+            with transaction.atomic():
+                model.objects.filter(pk__in=chunk).delete()
+
+
+HANDLERS = {
+    AdminJob.REASSIGN_GROUP: _reassign_group,
+    AdminJob.DELETE_POSTS: _delete_posts,
+    AdminJob.PURGE_IMAGES: _purge_images,
+    AdminJob.BAN_AUTHORS: _ban_authors,
+}
+
+
+def run(job, chunk_size=CHUNK_SIZE):
+    """Выполняет задачу с места, где она остановилась.
+
+    Каждая часть обрабатывается в своей короткой транзакции, после
+    неё сохраняется прогресс, поэтому задача не держит долгих
+    блокировок, а после перезапуска продолжается. Обработчики
+    идемпотентны: часть, прерванная до сохранения прогресса,
+    просто выполнится ещё раз.
+    """
+    handler = HANDLERS[job.action]
+    if job.action == AdminJob.BAN_AUTHORS:
+        # Авторы обрабатываются по одному: внутри их записи
+        # и так удаляются частями по CHUNK_SIZE.
+        chunk_size = AUTHORS_PER_CHUNK
+    target_ids = json.loads(job.target_ids)
+    params = json.loads(job.params)
+    try:
+        while job.processed < len(target_ids):
+            ids = target_ids[job.processed:job.processed + chunk_size]
+            handler(ids, params)
+            job.processed += len(ids)
+            job.save(update_fields=['processed'])
+    except Exception as error:
+        logger.exception('Задача %s завершилась ошибкой', job.pk)
+        job.status = AdminJob.FAILED
+        job.error = str(error)
+    else:
+        job.status = AdminJob.DONE
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished'])
+    return job
+
+
+def claim():
+    """Забирает следующую задачу из очереди или возвращает None."""
+    for job in AdminJob.objects.filter(
+        status=AdminJob.PENDING
+    ).order_by('created'):
+        claimed = AdminJob.objects.filter(
+            pk=job.pk, status=AdminJob.PENDING
+        ).update(status=AdminJob.RUNNING)
+        if claimed:
+            job.status = AdminJob.RUNNING
+            return job
+    return None
+
+
+def requeue_interrupted():
+    """Возвращает в очередь задачи, прерванные падением обработчика."""
+    return AdminJob.objects.filter(status=AdminJob.RUNNING).update(
+        status=AdminJob.PENDING
+    )
+
+
+def run_pending(chunk_size=CHUNK_SIZE):
+    """Выполняет все задачи из очереди, возвращает их количество."""
+    count = 0
+    job = claim()
+    while job is not None:
+        run(job, chunk_size)
+        count += 1
+        job = claim()
+    return count
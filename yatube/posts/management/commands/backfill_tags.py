@@ -0,0 +1,54 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import tags
+
+
+def _backfill(chunk):
+    # Соединения закрыты до запуска пула, каждый процесс
+    # открывает своё; при запуске через spawn настраивает Django.
+    django.setup()
+    try:
+        return tags.backfill(*chunk)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет хештеги и упоминания существующих постов, '
+        'обрабатывая диапазоны ключей в нескольких процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Сколько процессов обрабатывают части одновременно.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=tags.CHUNK_SIZE,
+            help='Сколько ключей постов в одной части.'
+        )
+
+    def handle(self, *args, **options):
+        chunks = tags.chunks(options['chunk_size'])
+        total = 0
+        if options['workers'] <= 1:
+            for chunk in chunks:
+                total += tags.backfill(*chunk)
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(options['workers']) as executor:
+                futures = [
+                    executor.submit(_backfill, chunk) for chunk in chunks
+                ]
+                for number, future in enumerate(as_completed(futures), 1):
+                    total += future.result()
+                    self.stdout.write(
+                        f'Частей обработано: {number} из {len(chunks)}'
+                    )
+        self.stdout.write(self.style.SUCCESS(f'Найдено меток: {total}'))
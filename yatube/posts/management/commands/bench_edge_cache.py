@@ -0,0 +1,156 @@
+import random
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class EdgeCache:
+    """Упрощённый общий кэш обратного прокси.
+
+    Хранит ответы с public и s-maxage с учётом Vary: Cookie,
+    по истечении срока перепроверяет их по ETag.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.vary = {}
+        self.stats = Counter()
+
+    def _key(self, client, url):
+        if 'cookie' in self.vary.get(url, ()):
+            return url, client.cookies.output()
+        return url, None
+
+    def get(self, client, url, now):
+        key = self._key(client, url)
+        entry = self.entries.get(key)
+        if entry and now < entry['expires']:
+            self.stats['hit'] += 1
+            return
+        if entry and entry['etag']:
+            response = client.get(url, HTTP_IF_NONE_MATCH=entry['etag'])
+            if response.status_code == 304:
+                self.stats['revalidated'] += 1
+                entry['expires'] = now + entry['ttl']
+                return
+        else:
+            response = client.get(url)
+        self.stats['miss'] += 1
+        self._store(client, url, response, now)
+
+    def _store(self, client, url, response, now):
+        cache_control = response.get('Cache-Control', '')
+        if 'public' not in cache_control or 's-maxage' not in cache_control:
+            return
+        ttl = int(cache_control.split('s-maxage=')[1].split(',')[0])
+        self.vary[url] = {
+            header.strip().lower()
+            for header in response.get('Vary', '').split(',')
+        }
+        self.entries[self._key(client, url)] = {
+            'etag': response.get('ETag'),
+            'ttl': ttl,
+            'expires': now + ttl,
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        'Моделирует поток просмотров лент через общий кэш обратного '
+        'прокси и считает долю ответов, отданных без приложения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Сколько просмотров страниц смоделировать.'
+        )
+        parser.add_argument(
+            '--rate', type=float, default=20,
+            help='Просмотров в секунду модельного времени.'
+        )
+        parser.add_argument(
+            '--users', type=int, default=50,
+            help='Сколько пользователей вошло на сайт.'
+        )
+        parser.add_argument(
+            '--logged-in', type=float, default=0.5,
+            help='Доля просмотров от вошедших пользователей.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Панель отладки добавляет к ответам Vary: Cookie и свой HTML.
+        with override_settings(DEBUG=False), transaction.atomic():
+            urls, clients = self._fixture(options['users'])
+            edge = EdgeCache()
+            guest = Client()
+            viewer_url = reverse('posts:viewer')
+            viewer_requests = 0
+            started = time.perf_counter()
+            for number in range(options['requests']):
+                now = number / options['rate']
+                url = rng.choice(urls)
+                if rng.random() < options['logged_in']:
+                    client = rng.choice(clients)
+                    client.get(viewer_url, {'view': 'bench'})
+                    viewer_requests += 1
+                else:
+                    client = guest
+                edge.get(client, url, now)
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        total = sum(edge.stats.values())
+        served = edge.stats['hit'] + edge.stats['revalidated']
+        self.stdout.write(
+            f'Просмотров: {total}, из кэша: {edge.stats["hit"]}, '
+            f'304: {edge.stats["revalidated"]}, '
+            f'до приложения: {edge.stats["miss"]}'
+        )
+        self.stdout.write(
+            f'Доля попаданий в общий кэш: {served / total:.1%}; '
+            f'личных запросов к /viewer/: {viewer_requests}; '
+            f'{elapsed:.1f} с реального времени'
+        )
+
+    def _fixture(self, user_count):
+        """Данные для прогона; откатываются вместе с транзакцией."""
+        users = [
+            User.objects.create_user(username=f'bench-edge-{number}')
+            for number in range(user_count)
+        ]
+        group = Group.objects.create(
+            title='Бенчмарк', slug='bench-edge', description='Бенчмарк'
+        )
+        posts = [
+            Post.objects.create(text='Пост', author=user, group=group)
+            for user in users[:10]
+        ]
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': group.slug}),
+        ]
+        urls += [
+            reverse('posts:profile', kwargs={'username': post.author})
+            for post in posts
+        ]
+        urls += [
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+            for post in posts
+        ]
+        clients = []
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            clients.append(client)
+        return urls, clients
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from posts import counters
+from posts.models import Comment, CounterShard, Post
+
+
+class Command(BaseCommand):
+    help = 'Сводит части счётчиков в одну строку на объект.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--name', choices=(counters.VIEWS, counters.COMMENTS),
+            help='Сжать только этот счётчик.'
+        )
+        parser.add_argument(
+            '--rebuild-comments', action='store_true',
+            help='Пересчитать число комментариев по таблице комментариев.'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild_comments']:
+            counters.reset(counters.COMMENTS, dict(
+                Comment.objects.exclude(post=None).order_by().values('post')
+                .annotate(total=Count('pk')).values_list('post', 'total')
+            ))
+            self.stdout.write('Число комментариев пересчитано.')
+        # Счётчики постов, удалённых до того, как это делал post_deleted.
+        orphans, _ = CounterShard.objects.exclude(
+            object_id__in=Post.objects.values('pk')
+        ).delete()
+        if orphans:
+            self.stdout.write(f'Удалено частей без поста: {orphans}')
+        compacted = counters.compact(options['name'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Сжато счётчиков: {compacted}')
+        )
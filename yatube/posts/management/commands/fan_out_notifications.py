@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import notifications
+
+
+class Command(BaseCommand):
+    help = 'Рассылает уведомления о новых постах и комментариях пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=notifications.BATCH_SIZE,
+            help='Сколько событий очереди обрабатывать за одну транзакцию.'
+        )
+        parser.add_argument(
+            '--loop', type=float, metavar='SECONDS',
+            help='Работать постоянно, опрашивая очередь с этим интервалом.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = notifications.fan_out(options['batch_size'])
+            if count:
+                self.stdout.write(f'Обработано событий: {count}')
+            if count < options['batch_size']:
+                if options['loop'] is None:
+                    break
+                time.sleep(options['loop'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import archive
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает помесячный архив авторов и групп.'
+
+    def handle(self, *args, **options):
+        archive.rebuild()
+        self.stdout.write(self.style.SUCCESS('Архив пересчитан.'))
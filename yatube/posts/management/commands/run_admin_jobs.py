@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import jobs
+
+
+class Command(BaseCommand):
+    help = 'Выполняет массовые операции, поставленные в очередь из админки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', type=float, metavar='SECONDS',
+            help='Работать постоянно, опрашивая очередь с этим интервалом.'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help=(
+                'Вернуть в очередь задачи, прерванные падением обработчика. '
+                'Используйте, только если другие обработчики не запущены.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            jobs.requeue_interrupted()
+        while True:
+            count = jobs.run_pending()
+            if count:
+                self.stdout.write(f'Выполнено задач: {count}')
+            if options['loop'] is None:
+                break
+            time.sleep(options['loop'])
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации авторов. По умолчанию только для '
+        'пользователей, чьи подписки изменились; --full пересчитывает всех.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать рекомендации для всех пользователей.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=recommendations.BATCH_SIZE,
+            help='Сколько пользователей обрабатывать за один проход.'
+        )
+
+    def handle(self, *args, **options):
+        users = recommendations.refresh(
+            full=options['full'], batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендации пересчитаны для пользователей: {users}'
+        ))
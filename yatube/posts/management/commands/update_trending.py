@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет рейтинг популярных постов по новым постам '
+        'и комментариям. Запускается периодически.'
+    )
+
+    def handle(self, *args, **options):
+        touched = trending.update()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг обновлён, затронуто постов: {touched}'
+        ))
@@ -0,0 +1,170 @@
+import io
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.models import Count, Sum
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+
+from core.asgi import build_environ
+from posts.models import GroupStats, Post, PostViewStats, User
+from posts.views import PER_PAGE
+
+# Те же параметры, что у {% thumbnail %} в карточке и на странице поста.
+THUMBNAIL = ('960x339', {'crop': 'center', 'upscale': True})
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает первые страницы ленты, популярные группы и профили '
+        'и заранее создаёт миниатюры их картинок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=3,
+            help='Сколько первых страниц главной ленты прогреть.'
+        )
+        parser.add_argument(
+            '--groups', type=int, default=10,
+            help='Сколько самых больших групп прогреть.'
+        )
+        parser.add_argument(
+            '--profiles', type=int, default=10,
+            help='Сколько самых просматриваемых профилей прогреть.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Сколько страниц и миниатюр готовить одновременно.'
+        )
+        parser.add_argument(
+            '--base-url',
+            help=(
+                'Адрес запущенного сервера. LocMemCache у каждого процесса '
+                'свой, поэтому кэш страниц прогревается только запросами '
+                'к самому серверу; без адреса страницы рендерятся здесь, '
+                'и прогреваются миниатюры и общие кэши.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        groups = list(
+            GroupStats.objects.filter(post_count__gt=0)
+            .select_related('group').order_by('-post_count')
+            [:options['groups']]
+        )
+        authors = self._top_authors(options['profiles'])
+        urls = [
+            f'{reverse("posts:index")}?page={page}'
+            for page in range(1, options['pages'] + 1)
+        ] + [
+            reverse('posts:group_list', args=(stats.group.slug,))
+            for stats in groups
+        ] + [
+            reverse('posts:profile', args=(username,))
+            for username in authors
+        ]
+        images = self._images(
+            options['pages'], [stats.group_id for stats in groups], authors
+        )
+        fetch = self._fetcher(options['base_url'])
+        for name, task, items in (
+            ('Страницы', fetch, urls),
+            ('Миниатюры', self._thumbnail, images),
+        ):
+            stage_started = time.perf_counter()
+            results = self._run(task, items, options['concurrency'])
+            self.stdout.write(
+                f'{name}: {len(items)} за '
+                f'{time.perf_counter() - stage_started:.2f} с, '
+                f'ошибок: {results.count(False)}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрев занял {time.perf_counter() - started:.2f} с'
+        ))
+
+    def _top_authors(self, limit):
+        """Самые просматриваемые авторы, дополненные самыми активными."""
+        authors = list(
+            PostViewStats.objects.values('post__author__username')
+            .annotate(total=Sum('views')).order_by('-total')
+            .values_list('post__author__username', flat=True)[:limit]
+        )
+        if len(authors) < limit:
+            authors += User.objects.exclude(username__in=authors).annotate(
+                post_count=Count('posts')
+            ).filter(post_count__gt=0).order_by('-post_count').values_list(
+                'username', flat=True
+            )[:limit - len(authors)]
+        return authors
+
+    def _images(self, pages, group_ids, usernames):
+        """Картинки постов, попадающих на прогреваемые страницы."""
+        posts = Post.objects.exclude(image='')
+        images = set(posts.values_list('image', flat=True)[:pages * PER_PAGE])
+        for group_id in group_ids:
+            images.update(posts.filter(group=group_id).values_list(
+                'image', flat=True
+            )[:PER_PAGE])
+        for username in usernames:
+            images.update(posts.filter(author__username=username).values_list(
+                'image', flat=True
+            )[:PER_PAGE])
+        return sorted(images)
+
+    def _fetcher(self, base_url):
+        if base_url:
+            def fetch(url):
+                with urllib.request.urlopen(base_url.rstrip('/') + url) as r:
+                    r.read()
+                    return r.status == 200
+            return fetch
+        application = get_wsgi_application()
+
+        def fetch(url):
+            path, _, query = url.partition('?')
+            status = []
+            result = application(
+                build_environ({
+                    'method': 'GET',
+                    'path': path,
+                    'query_string': query.encode(),
+                    'headers': [(b'host', b'localhost')],
+                }, io.BytesIO()),
+                lambda line, headers, exc_info=None: status.append(line)
+            )
+            try:
+                for _ in result:
+                    pass
+            finally:
+                result.close()
+            return status[0].startswith('200')
+        return fetch
+
+    def _thumbnail(self, image):
+        geometry, options = THUMBNAIL
+        get_thumbnail(image, geometry, **options)
+        return True
+
+    def _run(self, task, items, concurrency):
+        """Выполняет task для items не более чем в concurrency потоках."""
+        def safe(item):
+            try:
+                return task(item)
+            except (OSError, urllib.error.URLError) as error:
+                self.stderr.write(f'{item}: {error}')
+                return False
+            finally:
+                if concurrency > 1:
+                    connection.close()
+
+        if concurrency <= 1:
+            return [safe(item) for item in items]
+        with ThreadPoolExecutor(concurrency) as executor:
+            return list(executor.map(safe, items))
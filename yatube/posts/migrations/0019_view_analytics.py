@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_counter_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostViewStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('sketch', models.BinaryField(default=b'')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_stats', to='posts.Post')),
+            ],
+            options={
+                'unique_together': {('post', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PostReferrer',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('host', models.CharField(blank=True, max_length=255, verbose_name='Сайт')),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='referrers', to='posts.Post')),
+            ],
+            options={
+                'unique_together': {('post', 'day', 'host')},
+            },
+        ),
+    ]
@@ -15,7 +15,7 @@ class Group(models.Model):
 
 class Post(models.Model):
     text = models.TextField('Текст поста', help_text='Текст нового поста')
-    pub_date = models.DateTimeField(auto_now_add=True)
+    pub_date = models.DateTimeField(auto_now_add=True, db_index=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -42,6 +42,17 @@ class Post(models.Model):
 
     class Meta:
         ordering = ["-pub_date"]
+        # Архив автора и группы читает посты месяца диапазоном дат.
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_group_date_idx'
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -83,3 +94,319 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following'
     )
+
+
+class GroupStats(models.Model):
+    """Агрегированная статистика группы, обновляется инкрементально."""
+    group = models.OneToOneField(
+        Group,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='stats'
+    )
+    post_count = models.PositiveIntegerField('Количество постов', default=0)
+    last_activity = models.DateTimeField('Последняя активность')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-last_activity', '-group'],
+                name='groupstats_activity_idx'
+            ),
+        ]
+
+
+class GroupAuthorStats(models.Model):
+    """Количество постов автора в группе."""
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_stats'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_stats'
+    )
+    post_count = models.PositiveIntegerField('Количество постов', default=0)
+
+    class Meta:
+        unique_together = ('group', 'author')
+        indexes = [
+            models.Index(
+                fields=['group', '-post_count'],
+                name='groupauthor_top_idx'
+            ),
+        ]
+
+
+class BatchCheckpoint(models.Model):
+    """Отметка, до которой периодическая задача уже обработала данные."""
+    name = models.CharField(max_length=100, unique=True)
+    position = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.name}: {self.position}'
+
+
+class PostTrend(models.Model):
+    """Оценка популярности поста, пересчитывается пакетной задачей."""
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='trend'
+    )
+    velocity = models.FloatField(default=0)
+    score = models.FloatField(default=0, db_index=True)
+
+
+class AuthorSuggestion(models.Model):
+    """Рекомендованный пользователю автор, рассчитывается заранее."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['-score']
+        indexes = [
+            models.Index(
+                fields=['user', '-score'],
+                name='suggestion_user_score_idx'
+            ),
+        ]
+
+
+class SuggestionRefresh(models.Model):
+    """Пользователь, рекомендации которого нужно пересчитать."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+
+
+class AdminJob(models.Model):
+    """Массовая операция из админки, выполняемая в фоне по частям."""
+    REASSIGN_GROUP = 'reassign_group'
+    DELETE_POSTS = 'delete_posts'
+    PURGE_IMAGES = 'purge_images'
+    BAN_AUTHORS = 'ban_authors'
+    ACTION_CHOICES = (
+        (REASSIGN_GROUP, 'Перенос постов в группу'),
+        (DELETE_POSTS, 'Удаление постов'),
+        (PURGE_IMAGES, 'Удаление картинок'),
+        (BAN_AUTHORS, 'Блокировка авторов'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    action = models.CharField(
+        'Операция', max_length=20, choices=ACTION_CHOICES
+    )
+    target_ids = models.TextField('Объекты (JSON)')
+    params = models.TextField('Параметры (JSON)', default='{}')
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUS_CHOICES, default=PENDING,
+        db_index=True
+    )
+    total = models.PositiveIntegerField('Всего', default=0)
+    processed = models.PositiveIntegerField('Обработано', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_by = models.ForeignKey(
+        User,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+'
+    )
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created']
+
+    def __str__(self):
+        return f'{self.get_action_display()} #{self.pk}'
+
+
+class FeedVersion(models.Model):
+    """Версия ленты: растёт при каждом изменении её содержимого."""
+    key = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+
+class NotificationEvent(models.Model):
+    """Новый пост или комментарий, уведомления о котором не разосланы."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    comment = models.ForeignKey(
+        Comment,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+
+
+class Notification(models.Model):
+    """Уведомление пользователя о новом посте или комментарии."""
+    NEW_POST = 1
+    NEW_COMMENT = 2
+    KIND_CHOICES = (
+        (NEW_POST, 'Новый пост'),
+        (NEW_COMMENT, 'Новый комментарий'),
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    comment = models.ForeignKey(
+        Comment,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    created = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-pk']
+        indexes = [
+            models.Index(
+                fields=['user', '-id'],
+                name='notification_inbox_idx'
+            ),
+        ]
+
+
+class NotificationState(models.Model):
+    """Счётчик непрочитанных и последнее прочитанное уведомление."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='notification_state'
+    )
+    unread = models.PositiveIntegerField(default=0)
+    last_read_id = models.PositiveIntegerField(default=0)
+
+
+class FeedEvent(models.Model):
+    """Запись журнала новых постов для живого обновления лент.
+
+    Журнал играет роль брокера сообщений между процессами: каждый
+    процесс читает новые записи и раздаёт их своим подписчикам.
+    """
+    post_id = models.PositiveIntegerField()
+    author_id = models.PositiveIntegerField()
+    group_id = models.PositiveIntegerField(null=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+class PostTag(models.Model):
+    """Хештег или упоминание (@имя) из текста поста.
+
+    Дата поста скопирована сюда, чтобы лента метки читалась
+    по одному индексу (tag, pub_date) без обращения к постам.
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='tags'
+    )
+    tag = models.CharField('Метка', max_length=151)
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('post', 'tag')
+        indexes = [
+            models.Index(
+                fields=['tag', '-pub_date'],
+                name='posttag_feed_idx'
+            ),
+        ]
+
+
+class CounterShard(models.Model):
+    """Одна из частей счётчика объекта.
+
+    Увеличение попадает в случайную часть, поэтому одновременные
+    запросы не ждут блокировки одной строки; значение — сумма частей.
+    """
+    name = models.CharField(max_length=50)
+    object_id = models.PositiveIntegerField()
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('name', 'object_id', 'shard')
+
+
+class PostViewStats(models.Model):
+    """Просмотры поста за день и скетч HyperLogLog уникальных зрителей."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='view_stats'
+    )
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    sketch = models.BinaryField(default=b'')
+
+    class Meta:
+        unique_together = ('post', 'day')
+
+
+class PostReferrer(models.Model):
+    """Число переходов на пост за день с одного сайта."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='referrers'
+    )
+    day = models.DateField()
+    host = models.CharField('Сайт', max_length=255, blank=True)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('post', 'day', 'host')
+
+
+class ArchiveMonth(models.Model):
+    """Число постов автора или группы за месяц для навигации по архиву.
+
+    key — 'author:<id>' или 'group:<id>', month — первое число месяца.
+    """
+    key = models.CharField(max_length=100)
+    month = models.DateField()
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('key', 'month')
+        ordering = ['-month']
@@ -0,0 +1,237 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Max
+
+from .models import (Follow, Notification, NotificationEvent,
+                     NotificationState)
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+POLL_INTERVAL = 1
+POLL_LIMIT = 20
+
+
+def enqueue(post_id, comment_id=None):
+    """Ставит в очередь рассылку уведомлений о посте или комментарии."""
+    NotificationEvent.objects.create(post_id=post_id, comment_id=comment_id)
+
+
+def _notifications(events):
+    post_events = [event for event in events if event.comment_id is None]
+    followers = defaultdict(list)
+    for author_id, user_id in Follow.objects.filter(
+        author__in={event.post.author_id for event in post_events}
+    ).values_list('author', 'user'):
+        followers[author_id].append(user_id)
+    for event in events:
+        if event.comment_id is None:
+            for user_id in followers[event.post.author_id]:
+                yield Notification(
+                    user_id=user_id,
+                    kind=Notification.NEW_POST,
+                    post_id=event.post_id,
+                    created=event.post.pub_date,
+                )
+        elif event.comment.author_id != event.post.author_id:
+            yield Notification(
+                user_id=event.post.author_id,
+                kind=Notification.NEW_COMMENT,
+                post_id=event.post_id,
+                comment_id=event.comment_id,
+                created=event.comment.created,
+            )
+
+
+def _add_unread(counts):
+    NotificationState.objects.bulk_create(
+        [NotificationState(user_id=user_id) for user_id in counts],
+        ignore_conflicts=True
+    )
+    users_by_count = defaultdict(list)
+    for user_id, count in counts.items():
+        users_by_count[count].append(user_id)
+    for count, user_ids in users_by_count.items():
+        NotificationState.objects.filter(user__in=user_ids).update(
+            unread=F('unread') + count
+        )
+
+
+def fan_out(batch_size=BATCH_SIZE):
+    """Разворачивает пачку событий очереди в уведомления.
+
+    Уведомления пишутся кусками по batch_size строк, поэтому пост
+    автора с большим числом подписчиков не собирается в памяти
+    целиком. Счётчики непрочитанных меняются одним запросом
+    на каждое различное приращение. Возвращает число событий.
+    """
+    with transaction.atomic():
+        event_ids = list(
+            NotificationEvent.objects.select_for_update(skip_locked=True)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not event_ids:
+            return 0
+        events = list(
+            NotificationEvent.objects.filter(pk__in=event_ids)
+            .select_related('post', 'comment').order_by('pk')
+        )
+        notifications = _notifications(events)
+        counts = Counter()
+        while True:
+            chunk = list(islice(notifications, batch_size))
+            if not chunk:
+                break
+            Notification.objects.bulk_create(chunk)
+            counts.update(notification.user_id for notification in chunk)
+        _add_unread(counts)
+        NotificationEvent.objects.filter(pk__in=event_ids).delete()
+    return len(event_ids)
+
+
+def unread_count(user):
+    return NotificationState.objects.filter(user=user).values_list(
+        'unread', flat=True
+    ).first() or 0
+
+
+def mark_read(user):
+    """Отмечает всё прочитанным; возвращает прежнюю отметку прочтения."""
+    state, _ = NotificationState.objects.get_or_create(user=user)
+    last_id = user.notifications.aggregate(last=Max('pk'))['last'] or 0
+    NotificationState.objects.filter(user=user).update(
+        unread=0, last_read_id=last_id
+    )
+    return state.last_read_id
+
+
+class Watcher:
+    """Будит ожидающих долгого опроса при новых уведомлениях.
+
+    Таблицу уведомлений раз в POLL_INTERVAL читает один фоновый поток
+    на процесс, сколько бы запросов ни ждало; поток запускается
+    с первым ожидающим и завершается, когда ожидающих не остаётся.
+    Одновременно ждать могут не больше limit запросов: остальные
+    сразу получают отказ, чтобы не занять все потоки воркера.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiters = defaultdict(set)
+        self.last_id = None
+        self.thread = None
+
+    def register(self, user_id, limit):
+        """Событие, которое взведётся при уведомлении; None — мест нет."""
+        with self.lock:
+            if sum(map(len, self.waiters.values())) >= limit:
+                return None
+            if self.last_id is None:
+                self.last_id = latest_id()
+            event = threading.Event()
+            self.waiters[user_id].add(event)
+        self.ensure_thread()
+        return event
+
+    def unregister(self, user_id, event):
+        with self.lock:
+            self.waiters[user_id].discard(event)
+            if not self.waiters[user_id]:
+                del self.waiters[user_id]
+
+    def ensure_thread(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, name='notification-watcher',
+                    daemon=True
+                )
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(POLL_INTERVAL)
+            with self.lock:
+                if not self.waiters:
+                    self.thread = None
+                    self.last_id = None
+                    break
+            try:
+                self.poll()
+            except DatabaseError:
+                logger.exception('Не удалось прочитать уведомления')
+                connection.close()
+        connection.close()
+
+    def poll(self):
+        """Будит ожидающих, которым пришли уведомления после last_id.
+
+        Строки читаются только для ожидающих пользователей: рассылка
+        поста тысячам подписчиков не загружается в каждый процесс.
+        """
+        with self.lock:
+            user_ids = set(self.waiters)
+            last_id = self.last_id or 0
+        latest = Notification.objects.filter(pk__gt=last_id).aggregate(
+            last=Max('pk')
+        )['last']
+        if latest is None or not user_ids:
+            return
+        notified = set(
+            Notification.objects.filter(
+                pk__gt=last_id, pk__lte=latest, user__in=user_ids
+            ).values_list('user_id', flat=True).distinct()
+        )
+        with self.lock:
+            for user_id in notified:
+                for event in self.waiters.get(user_id, ()):
+                    event.set()
+            self.last_id = max(self.last_id or 0, latest)
+
+
+def latest_id():
+    return Notification.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+def _newer(user, since):
+    return list(
+        user.notifications.filter(pk__gt=since)
+        .select_related('post__author', 'comment__author')[:POLL_LIMIT]
+    )
+
+
+def wait(user, since, timeout=None, disconnected=None):
+    """Ждёт уведомлений новее since не дольше timeout секунд.
+
+    Сам запрос обращается к базе дважды — до и после ожидания,
+    следит за таблицей общий Watcher. None — свободных мест
+    для ожидания нет, клиенту стоит повторить позже. Если клиент
+    ушёл (взведён disconnected), ожидание прерывается раньше.
+    """
+    if timeout is None:
+        timeout = settings.NOTIFICATIONS_POLL_TIMEOUT
+    notifications = _newer(user, since)
+    if notifications or not timeout:
+        return notifications
+    event = watcher.register(user.pk, settings.NOTIFICATIONS_MAX_WAITERS)
+    if event is None:
+        return None
+    deadline = time.monotonic() + timeout
+    try:
+        while not event.wait(min(deadline - time.monotonic(), POLL_INTERVAL)):
+            if time.monotonic() >= deadline:
+                break
+            if disconnected is not None and disconnected.is_set():
+                return []
+    finally:
+        watcher.unregister(user.pk, event)
+    return _newer(user, since)
+
+
+watcher = Watcher()
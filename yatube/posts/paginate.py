@@ -1,4 +1,8 @@
 from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
 
 
 def pagination(request, *args, **kwargs):
@@ -6,3 +10,93 @@ def pagination(request, *args, **kwargs):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def estimated_count(queryset):
+    """Быстрая оценка числа строк таблицы без COUNT(*).
+
+    PostgreSQL хранит оценку в статистике планировщика, в остальных
+    базах берётся наибольший автоинкрементный ключ — один шаг по индексу.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row else 0
+    return queryset.model._default_manager.using(queryset.db).aggregate(
+        last=Max('pk')
+    )['last'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, оценивающий число строк больших таблиц без фильтров."""
+    threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset)
+            if estimate > self.threshold:
+                return estimate
+        return super().count
+
+
+class KeysetPage:
+    """Страница, полученная по ключу (field, pk) без OFFSET."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+def parse_cursor(cursor):
+    """Разбирает курсор вида '<ISO-дата>_<pk>', при ошибке None."""
+    value, _, pk = (cursor or '').rpartition('_')
+    try:
+        value = parse_datetime(value) if value else None
+    except ValueError:
+        # Похоже на дату, но такой даты нет: 2020-13-45.
+        return None
+    if value is None or not pk.isdigit():
+        return None
+    return value, int(pk)
+
+
+def keyset_pagination(request, queryset, per_page, field='pub_date'):
+    """Выдаёт страницу по убыванию (field, pk), начиная после курсора.
+
+    Стоимость запроса не зависит от глубины страницы: вместо OFFSET
+    используется условие по индексированному полю.
+    """
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    cursor = parse_cursor(request.GET.get('after'))
+    if cursor is not None:
+        value, pk = cursor
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': value})
+            | Q(**{field: value, 'pk__lt': pk})
+        )
+    object_list = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(object_list) > per_page:
+        object_list = object_list[:per_page]
+        last = object_list[-1]
+        next_cursor = f'{getattr(last, field).isoformat()}_{last.pk}'
+    return KeysetPage(object_list, next_cursor)
@@ -0,0 +1,119 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import (AuthorSuggestion, Follow, GroupAuthorStats,
+                     SuggestionRefresh, User)
+
+BATCH_SIZE = 500
+SUGGESTIONS_PER_USER = 5
+FRIEND_WEIGHT = 1.0
+GROUP_WEIGHT = 0.5
+
+
+def mark_stale(user_id):
+    """Ставит пользователя в очередь на пересчёт рекомендаций."""
+    SuggestionRefresh.objects.get_or_create(user_id=user_id)
+
+
+def _friends_of_friends(user_ids):
+    """Строки произведения матрицы подписок на себя для user_ids.
+
+    Для пары (u, w) считает, сколько авторов, на которых подписан u,
+    подписаны на w. Вычисляется в базе одним GROUP BY.
+    """
+    return (
+        Follow.objects
+        .filter(user__following__user__in=user_ids)
+        .values_list('user__following__user', 'author')
+        .annotate(paths=Count('pk'))
+        .order_by()
+    )
+
+
+def _shared_groups(user_ids):
+    """Для пары (u, w) считает группы, в которых писали оба."""
+    return (
+        GroupAuthorStats.objects
+        .filter(
+            post_count__gt=0,
+            group__author_stats__author__in=user_ids,
+            group__author_stats__post_count__gt=0,
+        )
+        .values_list('group__author_stats__author', 'author')
+        .annotate(groups=Count('group', distinct=True))
+        .order_by()
+    )
+
+
+def compute(user_ids):
+    """Пересчитывает и сохраняет рекомендации для пачки пользователей."""
+    scores = defaultdict(lambda: defaultdict(float))
+    for user_id, author_id, paths in _friends_of_friends(user_ids):
+        scores[user_id][author_id] += FRIEND_WEIGHT * paths
+    for user_id, author_id, groups in _shared_groups(user_ids):
+        scores[user_id][author_id] += GROUP_WEIGHT * groups
+    followed = defaultdict(set)
+    for user_id, author_id in Follow.objects.filter(
+        user__in=user_ids
+    ).values_list('user', 'author'):
+        followed[user_id].add(author_id)
+    suggestions = []
+    for user_id in user_ids:
+        candidates = [
+            (score, author_id)
+            for author_id, score in scores[user_id].items()
+            if author_id != user_id and author_id not in followed[user_id]
+        ]
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+        suggestions.extend(
+            AuthorSuggestion(user_id=user_id, author_id=author_id, score=score)
+            for score, author_id in candidates[:SUGGESTIONS_PER_USER]
+        )
+    with transaction.atomic():
+        AuthorSuggestion.objects.filter(user__in=user_ids).delete()
+        AuthorSuggestion.objects.bulk_create(suggestions)
+        SuggestionRefresh.objects.filter(user__in=user_ids).delete()
+    return len(suggestions)
+
+
+def stale_users():
+    """Пользователи из очереди и их подписчики.
+
+    Подписки пользователя входят в «друзей друзей» его подписчиков,
+    поэтому их рекомендации тоже устаревают.
+    """
+    queued = set(SuggestionRefresh.objects.values_list('user', flat=True))
+    followers = Follow.objects.filter(
+        author__in=queued
+    ).values_list('user', flat=True)
+    return sorted(queued.union(followers))
+
+
+def refresh(full=False, batch_size=BATCH_SIZE):
+    """Пересчитывает рекомендации пачками, возвращает число пользователей."""
+    if full:
+        user_ids = list(User.objects.order_by('pk').values_list(
+            'pk', flat=True
+        ))
+    else:
+        user_ids = stale_users()
+    for start in range(0, len(user_ids), batch_size):
+        compute(user_ids[start:start + batch_size])
+    return len(user_ids)
+
+
+def for_user(user):
+    """Готовые рекомендации: один запрос по индексу (user, -score).
+
+    Авторы, на которых пользователь подписался после расчёта,
+    отбрасываются в том же запросе.
+    """
+    if not user.is_authenticated:
+        return []
+    return list(
+        AuthorSuggestion.objects.filter(user=user)
+        .exclude(author__following__user=user)
+        .select_related('author')[:SUGGESTIONS_PER_USER]
+    )
@@ -0,0 +1,97 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import (archive, broker, counters, group_stats, notifications,
+               recommendations, tags, versions)
+from .models import Comment, Follow, Group, Post
+
+
+@receiver(post_init, sender=Post)
+def remember_post_state(sender, instance, **kwargs):
+    """Запоминает исходные группу, автора и текст, чтобы учесть их смену."""
+    instance._initial_group_id = instance.group_id
+    instance._initial_author_id = instance.author_id
+    # Отложенное поле не загружается: иначе post_init вызовется снова.
+    instance._initial_text = instance.__dict__.get('text')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    old = (instance._initial_group_id, instance._initial_author_id)
+    new = (instance.group_id, instance.author_id)
+    if created:
+        group_stats.add_post(*new, instance.pub_date)
+        archive.add_post(new[1], new[0], instance.pub_date)
+        notifications.enqueue(instance.pk)
+        broker.publish(instance)
+    elif old != new:
+        group_stats.remove_post(*old)
+        group_stats.add_post(*new, instance.pub_date)
+        archive.remove_post(old[1], old[0], instance.pub_date)
+        archive.add_post(new[1], new[0], instance.pub_date)
+    text = instance.__dict__.get('text')
+    if text is not None and (created or text != instance._initial_text):
+        tags.update_post(instance)
+        instance._initial_text = text
+    versions.bump(
+        *versions.post_keys(instance.pk, instance.author_id, old[0]),
+        *versions.post_keys(instance.pk, instance.author_id, new[0]),
+    )
+    instance._initial_group_id, instance._initial_author_id = new
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    group_stats.remove_post(
+        instance._initial_group_id, instance._initial_author_id
+    )
+    archive.remove_post(
+        instance._initial_author_id, instance._initial_group_id,
+        instance.pub_date
+    )
+    # Комментарии поста не удаляются, а отвязываются (SET_NULL) одним
+    # UPDATE без сигналов, поэтому его счётчики убираются здесь.
+    counters.drop(instance.pk)
+    versions.bump(*versions.post_keys(
+        instance.pk, instance._initial_author_id, instance._initial_group_id
+    ))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if created:
+        group_stats.create_group_stats(instance)
+    versions.bump(f'group:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    if instance.post_id is None:
+        return
+    if kwargs.get('created'):
+        notifications.enqueue(instance.post_id, instance.pk)
+        counters.increment(counters.COMMENTS, instance.post_id)
+    elif kwargs['signal'] is post_delete:
+        counters.increment(counters.COMMENTS, instance.post_id, -1)
+    else:
+        versions.bump(f'post:{instance.post_id}')
+        return
+    # Число комментариев видно в карточках всех лент с постом.
+    counters.invalidate(counters.COMMENTS, instance.post_id)
+    if Comment.post.is_cached(instance):
+        post = (instance.post.author_id, instance.post.group_id)
+    else:
+        post = Post.objects.filter(pk=instance.post_id).values_list(
+            'author', 'group'
+        ).first()
+    if post is None:
+        # Пост уже удалён, его ленты обновил post_deleted.
+        return
+    versions.bump(*versions.post_keys(instance.post_id, *post))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    recommendations.mark_stale(instance.user_id)
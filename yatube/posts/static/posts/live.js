@@ -0,0 +1,53 @@
+// Живое обновление ленты: по SSE приходят id новых постов,
+// и вместо перезагрузки страницы показывается плашка.
+// Поток открывается только вошедшим пользователям: о зрителе
+// сообщает viewer.js. Если сервер отказал (503) или соединение
+// закрылось, переподключение — с растущей паузой.
+(function () {
+  var feed = document.querySelector('[data-live-feed]');
+  if (!feed || !window.EventSource) {
+    return;
+  }
+  var banner = feed.querySelector('[data-live-banner]');
+  var counter = feed.querySelector('[data-live-count]');
+  var count = 0;
+  var MIN_DELAY = 5000;
+  var MAX_DELAY = 10 * 60 * 1000;
+  var delay = MIN_DELAY;
+
+  function connect() {
+    var source = new EventSource(feed.dataset.liveFeed);
+    source.addEventListener('open', function () {
+      delay = MIN_DELAY;
+    });
+    source.addEventListener('post', function () {
+      count += 1;
+      counter.textContent = ': ' + count;
+      banner.hidden = false;
+    });
+    source.addEventListener('reset', function () {
+      counter.textContent = '';
+      banner.hidden = false;
+    });
+    source.addEventListener('error', function () {
+      if (source.readyState === EventSource.CLOSED) {
+        setTimeout(connect, delay);
+        delay = Math.min(delay * 2, MAX_DELAY);
+      }
+    });
+  }
+
+  function start(state) {
+    if (state.authenticated) {
+      connect();
+    }
+  }
+
+  if (window.viewerState) {
+    start(window.viewerState);
+  } else {
+    document.addEventListener('viewer:state', function (event) {
+      start(event.detail);
+    }, {once: true});
+  }
+})();
@@ -0,0 +1,120 @@
+// Заполняет личные части общей для всех зрителей страницы.
+// Оболочка отдаётся из кэша как гостевая; всё, что зависит
+// от пользователя, приходит одним запросом к posts:viewer.
+(function () {
+  var script = document.currentScript;
+  var params = new URLSearchParams();
+  params.set('view', script.dataset.view);
+  document.querySelectorAll('[data-post-id]').forEach(function (el) {
+    params.append('post', el.dataset.postId);
+  });
+  document.querySelectorAll('[data-author-id]').forEach(function (el) {
+    params.append('author', el.dataset.authorId);
+  });
+  var viewed = document.querySelector('[data-viewed-post]');
+  if (viewed) {
+    params.set('viewed', viewed.dataset.viewedPost);
+    params.set('ref', document.referrer);
+  }
+  if (document.querySelector('[data-viewer-suggestions]')) {
+    params.set('suggestions', '1');
+  }
+
+  function each(selector, callback) {
+    document.querySelectorAll(selector).forEach(callback);
+  }
+
+  function apply(state) {
+    if (!state.authenticated) {
+      return;
+    }
+    each('[data-viewer-header]', function (el) {
+      el.innerHTML = state.header;
+    });
+    each('[data-viewer-auth]', function (el) {
+      el.hidden = false;
+    });
+    each('form[data-viewer-csrf]', function (form) {
+      var input = document.createElement('input');
+      input.type = 'hidden';
+      input.name = 'csrfmiddlewaretoken';
+      input.value = state.csrf_token;
+      form.appendChild(input);
+    });
+    Object.keys(state.posts).forEach(function (id) {
+      var flags = state.posts[id];
+      each('[data-viewer-edit="' + id + '"]', function (el) {
+        el.hidden = !flags.can_edit;
+      });
+      each('[data-viewer-commented="' + id + '"]', function (el) {
+        el.hidden = !flags.commented;
+      });
+    });
+    state.following.forEach(function (id) {
+      each('[data-viewer-follows="' + id + '"]', function (el) {
+        el.hidden = false;
+      });
+      each('[data-viewer-not-follows="' + id + '"]', function (el) {
+        el.hidden = true;
+      });
+    });
+    if (state.suggestions) {
+      each('[data-viewer-suggestions]', function (el) {
+        el.innerHTML = state.suggestions;
+      });
+    }
+  }
+
+  // Долгий опрос уведомлений: запрос висит, пока не появится новое.
+  // Опрашивает только видимая вкладка; при отказе сервера или ошибке
+  // пауза растёт, чтобы открытые вкладки не занимали его потоки.
+  var MIN_DELAY = 1000;
+  var MAX_DELAY = 5 * 60 * 1000;
+  var delay = MIN_DELAY;
+
+  function poll(url, since) {
+    if (document.hidden) {
+      document.addEventListener('visibilitychange', function resume() {
+        if (!document.hidden) {
+          document.removeEventListener('visibilitychange', resume);
+          poll(url, since);
+        }
+      });
+      return;
+    }
+    fetch(url + '?since=' + since, {credentials: 'same-origin'})
+      .then(function (response) {
+        if (!response.ok) {
+          var error = new Error(response.status);
+          error.retryAfter = Number(response.headers.get('Retry-After'));
+          throw error;
+        }
+        return response.json();
+      })
+      .then(function (data) {
+        delay = MIN_DELAY;
+        each('[data-viewer-unread]', function (el) {
+          el.textContent = data.unread || '';
+        });
+        poll(url, data.last_id);
+      })
+      .catch(function (error) {
+        delay = Math.min(
+          Math.max(delay * 2, (error.retryAfter || 0) * 1000), MAX_DELAY
+        );
+        setTimeout(function () { poll(url, since); }, delay);
+      });
+  }
+
+  fetch(script.dataset.endpoint + '?' + params, {credentials: 'same-origin'})
+    .then(function (response) { return response.json(); })
+    .then(function (state) {
+      apply(state);
+      // Остальные скрипты страницы узнают о зрителе отсюда.
+      window.viewerState = state;
+      document.dispatchEvent(new CustomEvent('viewer:state', {detail: state}));
+      if (state.authenticated) {
+        poll(state.notifications_url, state.last_notification_id);
+      }
+    });
+})();
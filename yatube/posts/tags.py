@@ -0,0 +1,96 @@
+import re
+
+from django.db import transaction
+
+from .models import Post, PostTag, User
+
+HASHTAG = re.compile(r'(?<![\w#&])#(\w{1,100})')
+# Допустимые в имени пользователя символы, без точки в конце.
+MENTION = re.compile(r'(?<![\w@])@([\w.+-]{0,149}[\w+-])')
+CHUNK_SIZE = 1000
+
+
+def hashtags(text):
+    return {tag.lower() for tag in HASHTAG.findall(text)}
+
+
+def mentions(text):
+    return set(MENTION.findall(text))
+
+
+def normalize(tag):
+    """Ключ метки в таблице: хештег в нижнем регистре, упоминание с @."""
+    if tag.startswith('@'):
+        return tag
+    return tag.lstrip('#').lower()
+
+
+def extract(posts):
+    """Метки постов: хештеги и упоминания существующих пользователей.
+
+    posts — пары (post, text); имена из упоминаний проверяются
+    одним запросом на всю пачку.
+    """
+    found = {post: (hashtags(text), mentions(text)) for post, text in posts}
+    usernames = set().union(*(names for _, names in found.values()))
+    known = set(
+        User.objects.filter(username__in=usernames)
+        .values_list('username', flat=True)
+    ) if usernames else set()
+    return {
+        post: tags | {f'@{name}' for name in names & known}
+        for post, (tags, names) in found.items()
+    }
+
+
+def _tag_rows(post_id, pub_date, tags):
+    return [
+        PostTag(post_id=post_id, tag=tag, pub_date=pub_date) for tag in tags
+    ]
+
+
+@transaction.atomic
+def update_post(post):
+    """Приводит метки поста в соответствие с его текстом."""
+    tags = extract([(post, post.text)])[post]
+    existing = set(post.tags.values_list('tag', flat=True))
+    if existing - tags:
+        post.tags.filter(tag__in=existing - tags).delete()
+    PostTag.objects.bulk_create(
+        _tag_rows(post.pk, post.pub_date, tags - existing),
+        ignore_conflicts=True
+    )
+
+
+def backfill(start, stop):
+    """Строит метки постов с pk в [start, stop); возвращает их число.
+
+    Функция не зависит от соседних частей, поэтому части можно
+    обрабатывать параллельно, а повторный запуск ничего не дублирует.
+    """
+    posts = Post.objects.filter(pk__gte=start, pk__lt=stop).values_list(
+        'pk', 'pub_date', 'text'
+    )
+    pub_dates = {}
+    texts = []
+    for pk, pub_date, text in posts.iterator(chunk_size=CHUNK_SIZE):
+        pub_dates[pk] = pub_date
+        texts.append((pk, text))
+    rows = [
+        row for pk, tags in extract(texts).items()
+        for row in _tag_rows(pk, pub_dates[pk], tags)
+    ]
+    PostTag.objects.bulk_create(rows, ignore_conflicts=True)
+    return len(rows)
+
+
+def chunks(chunk_size=CHUNK_SIZE):
+    """Диапазоны pk постов по chunk_size ключей."""
+    first = Post.objects.order_by('pk').values_list('pk', flat=True).first()
+    last = Post.objects.order_by('-pk').values_list('pk', flat=True).first()
+    if first is None:
+        return []
+    return [
+        (start, min(start + chunk_size, last + 1))
+        for start in range(first, last + 1, chunk_size)
+    ]
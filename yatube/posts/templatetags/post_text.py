@@ -0,0 +1,36 @@
+import re
+
+from django import template
+from django.urls import reverse
+from django.utils.html import conditional_escape, format_html
+from django.utils.safestring import mark_safe
+
+from posts.tags import HASHTAG, MENTION
+
+register = template.Library()
+
+TAGS = re.compile(f'{HASHTAG.pattern}|{MENTION.pattern}')
+
+
+def _link(match):
+    hashtag, mention = match.groups()
+    tag = hashtag.lower() if hashtag else f'@{mention}'
+    return format_html(
+        '<a href="{}">{}</a>',
+        reverse('posts:tag_feed', args=(tag,)),
+        match.group(0)
+    )
+
+
+@register.filter(needs_autoescape=True)
+def linkify_tags(text, autoescape=True):
+    """Превращает хештеги и упоминания в ссылки на ленты меток."""
+    escape = conditional_escape if autoescape else str
+    parts = []
+    position = 0
+    for match in TAGS.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(_link(match))
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return mark_safe(''.join(parts))
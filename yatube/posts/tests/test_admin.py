@@ -0,0 +1,63 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Group, Post
+from posts.paginate import EstimatedCountPaginator
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Первый тестовый пост', author=cls.admin, group=cls.group
+        )
+        Post.objects.create(text='Совсем другой текст', author=cls.admin)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_fulltext_search(self):
+        """Поиск по тексту идёт через полнотекстовый индекс."""
+        self.assertEqual(
+            list(search.search(Post.objects.all(), 'ТЕСТ')), [self.post]
+        )
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.assertFalse(search.search(Post.objects.all(), 'тест').exists())
+        self.assertEqual(
+            list(search.search(Post.objects.all(), 'исправ')), [self.post]
+        )
+
+    def test_changelist(self):
+        """Список постов в админке открывается и ищет."""
+        url = reverse('admin:posts_post_changelist')
+        response = self.client.get(url, {'q': 'другой'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.client.get(url)
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_estimated_count(self):
+        """Для большой таблицы без фильтров COUNT(*) не выполняется."""
+        last_pk = Post.objects.order_by('pk').last().pk
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        with mock.patch.object(EstimatedCountPaginator, 'threshold', 0):
+            with self.assertNumQueries(1):
+                self.assertEqual(paginator.count, last_pk)
+        filtered = EstimatedCountPaginator(
+            Post.objects.filter(group=self.group), 10
+        )
+        self.assertEqual(filtered.count, 1)
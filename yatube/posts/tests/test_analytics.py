@@ -0,0 +1,89 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.hyperloglog import HyperLogLog
+from posts import analytics, counters
+from posts.models import Post, PostReferrer, PostViewStats
+
+User = get_user_model()
+
+
+class HyperLogLogTests(TestCase):
+    def test_estimate_and_merge(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for value in range(3000):
+            first.add(value)
+            second.add(value + 1500)
+        self.assertAlmostEqual(first.count(), 3000, delta=300)
+        first.merge(HyperLogLog.from_bytes(second.to_bytes()))
+        self.assertAlmostEqual(first.count(), 4500, delta=450)
+
+
+@mock.patch.object(analytics.ViewBuffer, 'ensure_flusher')
+class ViewAnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.buffer = analytics.ViewBuffer()
+
+    def test_viewer_endpoint_only_buffers(self, ensure_flusher):
+        """Просмотр записывается в буфер, а не в базу."""
+        with mock.patch.object(analytics, 'buffer', self.buffer):
+            response = self.client.get(reverse('posts:viewer'), {
+                'viewed': self.post.pk, 'ref': 'https://example.com/a',
+            })
+        self.assertEqual(response.json(), {'authenticated': False})
+        self.assertFalse(PostViewStats.objects.exists())
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(
+            list(PostReferrer.objects.values_list('host', 'views')),
+            [('example.com', 1)]
+        )
+        ensure_flusher.assert_called_once()
+
+    def test_buffer_size_is_capped(self, ensure_flusher):
+        """Перебор id не раздувает буфер: новые пары сверх предела
+        отбрасываются, а уже учтённые продолжают считаться."""
+        with mock.patch.object(analytics, 'MAX_ENTRIES', 2):
+            self.assertTrue(self.buffer.record(self.post.pk, 'a'))
+            self.assertTrue(self.buffer.record(self.post.pk + 100, 'a'))
+            self.assertFalse(self.buffer.record(self.post.pk + 101, 'a'))
+            self.assertTrue(self.buffer.record(self.post.pk, 'b'))
+        self.assertEqual(len(self.buffer.entries), 2)
+        with self.assertLogs(analytics.logger, 'WARNING'):
+            self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(self.buffer.dropped, 0)
+
+    def test_flush_merges_batches(self, ensure_flusher):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        for viewer in ('a', 'b', 'a'):
+            self.buffer.record(self.post.pk, viewer)
+        self.buffer.record(self.post.pk, 'a', day=yesterday)
+        self.buffer.record(self.post.pk + 100, 'a')
+        self.buffer.flush()
+        self.buffer.record(self.post.pk, 'c')
+        self.buffer.flush()
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(PostViewStats.objects.count(), 2)
+        self.assertEqual(counters.get(counters.VIEWS, self.post.pk), 5)
+        summary = analytics.author_summary(self.author)
+        self.assertEqual(summary['views'], 5)
+        self.assertEqual(summary['unique'], 3)
+        self.assertEqual(
+            [(row['views'], row['unique']) for row in summary['days']],
+            [(4, 3), (1, 1)]
+        )
+        response = self.client.get(
+            reverse('posts:profile', args=(self.author.username,))
+        )
+        self.assertContains(response, 'Просмотры за 30 дней: 5')
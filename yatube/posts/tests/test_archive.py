@@ -0,0 +1,83 @@
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import ArchiveMonth, Group, Post
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = {}
+        for year, month, day in ((2020, 1, 5), (2020, 1, 20), (2022, 7, 1)):
+            post = Post.objects.create(
+                text=f'Пост {year}-{month}', author=cls.author,
+                group=cls.group
+            )
+            # pub_date заполняется при создании; сдвигаем его в прошлое.
+            post.pub_date = timezone.make_aware(datetime(year, month, day))
+            Post.objects.filter(pk=post.pk).update(pub_date=post.pub_date)
+            cls.posts[year, month, day] = post
+        call_command('rebuild_archive', stdout=StringIO())
+
+    def counts(self, key):
+        return {
+            (row.month.year, row.month.month): row.post_count
+            for row in ArchiveMonth.objects.filter(key=key, post_count__gt=0)
+        }
+
+    def test_rollup_follows_saves_and_deletes(self):
+        key = f'author:{self.author.pk}'
+        self.assertEqual(self.counts(key), {(2020, 1): 2, (2022, 7): 1})
+        post = self.posts[2020, 1, 5]
+        post.group = None
+        post.save()
+        self.assertEqual(
+            self.counts(f'group:{self.group.pk}'), {(2020, 1): 1, (2022, 7): 1}
+        )
+        self.posts[2022, 7, 1].delete()
+        self.assertEqual(self.counts(key), {(2020, 1): 2})
+
+    def test_archive_pages(self):
+        response = self.client.get(
+            reverse('posts:profile_archive', args=(self.author.username,))
+        )
+        self.assertEqual(
+            [year for year, _ in response.context['years']], [2022, 2020]
+        )
+        response = self.client.get(reverse(
+            'posts:group_archive_month', args=(self.group.slug, 2020, 1)
+        ))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.posts[2020, 1, 20], self.posts[2020, 1, 5]]
+        )
+        self.assertEqual(response.context['next'].month.year, 2022)
+        self.assertIsNone(response.context['previous'])
+        response = self.client.get(reverse(
+            'posts:profile_archive_month',
+            args=(self.author.username, 2020, 13)
+        ))
+        self.assertEqual(response.status_code, 404)
+        for name, arg in (
+            ('posts:profile_archive_month', self.author.username),
+            ('posts:group_archive_month', self.group.slug),
+        ):
+            for year, month in (
+                (9999, 12), (0, 1), (99999999999999999999, 1),
+            ):
+                response = self.client.get(
+                    reverse(name, args=(arg, year, month))
+                )
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import broker
+from posts.models import FeedEvent, Group, Post
+
+User = get_user_model()
+
+
+@mock.patch.object(broker.Broker, 'ensure_pump')
+class BrokerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+
+    def test_events_reach_matching_subscribers(self, ensure_pump):
+        feed_broker = broker.Broker()
+        index = feed_broker.subscribe({'index'})
+        group = feed_broker.subscribe({f'group:{self.group.pk}'})
+        post = Post.objects.create(text='Пост', author=self.author)
+        feed_broker.poll()
+        self.assertEqual(index.get(timeout=0).post_id, post.pk)
+        self.assertIsNone(group.get(timeout=0))
+        ensure_pump.assert_called()
+
+    def test_slow_subscriber_is_reset(self, ensure_pump):
+        subscription = broker.Subscription({'index'}, max_pending=2)
+        for event in FeedEvent.objects.bulk_create(
+            FeedEvent(post_id=1, author_id=1) for _ in range(3)
+        ):
+            subscription.put(event)
+        self.assertEqual(subscription.get(timeout=0), broker.RESET)
+        self.assertIsNone(subscription.get(timeout=0))
+
+    def test_stream_replays_after_last_event_id(self, ensure_pump):
+        before = Post.objects.create(text='Старый', author=self.author)
+        last_id = FeedEvent.objects.get(post_id=before.pk).pk
+        other = Post.objects.create(text='Другой', author=self.author)
+        post = Post.objects.create(
+            text='Новый', author=self.author, group=self.group
+        )
+        self.client.force_login(self.author)
+        response = self.client.get(
+            reverse('posts:group_stream', kwargs={'slug': self.group.slug}),
+            HTTP_LAST_EVENT_ID=str(last_id),
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        self.assertTrue(next(chunks).startswith(b'retry:'))
+        message = next(chunks).decode()
+        self.assertIn('event: post', message)
+        self.assertIn(f'"id": {post.pk}', message)
+        self.assertNotIn(f'"id": {other.pk}', message)
+        response.close()
+        self.assertFalse(broker.broker.subscriptions)
+
+    def test_streams_require_login(self, ensure_pump):
+        for name in ('posts:feed_stream', 'posts:follow_stream'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 403)
+
+    def test_streams_are_limited_per_process(self, ensure_pump):
+        """Сверх лимита — 503, а подписка снимается и без отдачи."""
+        self.client.force_login(self.author)
+        url = reverse('posts:feed_stream')
+        with override_settings(LIVE_FEED_MAX_STREAMS=1):
+            response = self.client.get(url)
+            busy = self.client.get(url)
+            self.assertEqual(busy.status_code, 503)
+            self.assertEqual(busy['Retry-After'], str(broker.BUSY_RETRY))
+            self.assertTrue(busy.content.startswith(b'retry:'))
+            response.close()
+            self.assertFalse(broker.broker.subscriptions)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            response.close()
@@ -0,0 +1,95 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Comment, CounterShard, Group, Post
+
+User = get_user_model()
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_increments_spread_and_compact(self):
+        for _ in range(50):
+            counters.increment(counters.VIEWS, self.post.pk)
+        self.assertGreater(CounterShard.objects.count(), 1)
+        self.assertEqual(counters.get(counters.VIEWS, self.post.pk), 50)
+        counters.increment(counters.VIEWS, self.post.pk, 2)
+        self.assertEqual(counters.get(counters.VIEWS, self.post.pk), 50)
+        self.assertEqual(counters.compact(), 1)
+        self.assertEqual(
+            list(CounterShard.objects.values_list('shard', 'count')),
+            [(0, 52)]
+        )
+        cache.clear()
+        self.assertEqual(counters.get(counters.VIEWS, self.post.pk), 52)
+
+    def test_post_views_and_comment_counts(self):
+        counters.increment(counters.VIEWS, self.post.pk, 2)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        self.assertEqual(response.context['post'].view_count, 2)
+        comment = Comment.objects.create(
+            post=self.post, author=self.author, text='Первый'
+        )
+        Comment.objects.create(post=self.post, author=self.author, text='Ещё')
+        comment.delete()
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'][0].comment_count, 1)
+
+    def test_comments_change_feed_versions(self):
+        """Новый комментарий меняет ETag лент и число в карточке."""
+        group = Group.objects.create(title='Группа', slug='group')
+        post = Post.objects.create(
+            text='В группе', author=self.author, group=group
+        )
+        urls = (
+            reverse('posts:group_list', args=(group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        Comment.objects.create(post=post, author=self.author, text='Новый')
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['page_obj'][0].comment_count, 1)
+
+    def test_rebuild_comment_counts(self):
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.author, text='Старый')
+            for _ in range(3)
+        ])
+        call_command('compact_counters', rebuild_comments=True,
+                     stdout=StringIO())
+        self.assertEqual(counters.get(counters.COMMENTS, self.post.pk), 3)
+
+    def test_deleted_post_counters_are_removed(self):
+        post = Post.objects.create(text='Удаляемый', author=self.author)
+        counters.increment(counters.VIEWS, post.pk)
+        Comment.objects.create(post=post, author=self.author, text='Ок')
+        post_id = post.pk
+        post.delete()
+        self.assertFalse(
+            CounterShard.objects.filter(object_id=post_id).exists()
+        )
+        CounterShard.objects.create(
+            name=counters.VIEWS, object_id=post_id, shard=0, count=3
+        )
+        call_command('compact_counters', stdout=StringIO())
+        self.assertFalse(
+            CounterShard.objects.filter(object_id=post_id).exists()
+        )
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalResponseTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+
+    def test_not_modified_for_guests(self):
+        """Гость с актуальным ETag получает 304 без рендеринга."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('s-maxage', response['Cache-Control'])
+                self.assertIn('Last-Modified', response)
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_validators(self):
+        """Новый пост и комментарий меняют ETag затронутых страниц."""
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        Post.objects.create(text='Новый', author=self.user, group=self.group)
+        # Главная ещё 20 секунд отдаётся из кэша со старым ETag.
+        cache.clear()
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, 200)
+        detail = self.urls[-1]
+        etag = self.client.get(detail)['ETag']
+        Comment.objects.create(post=self.post, author=self.user, text='Ок')
+        self.assertNotEqual(self.client.get(detail)['ETag'], etag)
+
+    def test_users_get_shared_shell(self):
+        """Пользователь получает ту же оболочку, что и гость."""
+        guest = {url: self.client.get(url) for url in self.urls}
+        self.client.force_login(self.user)
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.getvalue(), guest[url].getvalue()
+                )
+                self.assertEqual(response['ETag'], guest[url]['ETag'])
+                self.assertIn('public', response['Cache-Control'])
+                self.assertNotIn('Cookie', response.get('Vary', ''))
+
+    def test_cached_index_keeps_its_own_etag(self):
+        """Копия главной из кэша отдаётся со своим, а не свежим ETag."""
+        url = reverse('posts:index')
+        cached = self.client.get(url)
+        Post.objects.create(text='Новый', author=self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.content, cached.content)
+        self.assertEqual(response['ETag'], cached['ETag'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=cached['ETag'])
+        self.assertEqual(response.status_code, 304)
+        cache.clear()
+        self.assertNotEqual(self.client.get(url)['ETag'], cached['ETag'])
@@ -0,0 +1,99 @@
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import jobs
+from posts.models import AdminJob, Comment, Group, GroupStats, Post
+
+User = get_user_model()
+
+
+class AdminJobTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.spammer)
+            for i in range(5)
+        ]
+        self.url = reverse('admin:posts_post_changelist')
+
+    def select(self, action, **extra):
+        return self.client.post(self.url, {
+            'action': action,
+            helpers.ACTION_CHECKBOX_NAME: [post.pk for post in self.posts],
+            **extra,
+        })
+
+    def test_reassign_group_runs_in_background(self):
+        """Перенос ставится в очередь и выполняется частями."""
+        response = self.select('reassign_group')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AdminJob.objects.exists())
+        self.select('reassign_group', apply='1', group=self.group.pk)
+        job = AdminJob.objects.get()
+        self.assertEqual((job.status, job.total), (AdminJob.PENDING, 5))
+        self.assertFalse(Post.objects.filter(group=self.group).exists())
+        self.assertEqual(jobs.run_pending(chunk_size=2), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (AdminJob.DONE, 5))
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 5)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 5
+        )
+
+    def test_ban_authors(self):
+        """Блокировка автора удаляет его посты и комментарии."""
+        Comment.objects.create(
+            post=self.posts[0], author=self.spammer, text='Спам'
+        )
+        self.select('ban_authors')
+        jobs.run_pending()
+        self.spammer.refresh_from_db()
+        self.assertFalse(self.spammer.is_active)
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.filter(author=self.spammer).exists())
+
+    def test_actions_require_permissions(self):
+        """Сотрудник с правом только на просмотр задач не ставит."""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        staff.user_permissions.add(
+            *Permission.objects.filter(codename__in=(
+                'view_post', 'change_post', 'delete_post'
+            ))
+        )
+        self.client.force_login(staff)
+        response = self.client.get(self.url)
+        actions = [
+            name for name, _ in
+            response.context['action_form'].fields['action'].choices
+        ]
+        self.assertIn('delete_posts', actions)
+        self.assertNotIn('ban_authors', actions)
+        self.select('ban_authors')
+        staff.user_permissions.set(
+            Permission.objects.filter(codename='view_post')
+        )
+        staff = User.objects.get(pk=staff.pk)
+        self.client.force_login(staff)
+        for action in ('delete_posts', 'purge_images', 'ban_authors'):
+            self.select(action)
+        self.select('reassign_group', apply='1', group=self.group.pk)
+        self.assertFalse(AdminJob.objects.exists())
+
+    def test_progress_in_admin(self):
+        self.select('delete_posts')
+        response = self.client.get(reverse('admin:posts_adminjob_changelist'))
+        self.assertContains(response, '0 из 5 (0%)')
@@ -0,0 +1,120 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.querybudget import enforce_budgets
+from posts import notifications
+from posts.models import Comment, Follow, Notification, Post
+
+User = get_user_model()
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_fan_out(self):
+        """Подписчики узнают о посте, автор — о чужом комментарии."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(post=post, author=self.author, text='Сам')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Ок'
+        )
+        self.assertEqual(notifications.fan_out(batch_size=2), 2)
+        self.assertEqual(notifications.fan_out(batch_size=2), 1)
+        self.assertEqual(notifications.fan_out(), 0)
+        self.assertEqual(
+            list(self.reader.notifications.values_list('kind', 'post')),
+            [(Notification.NEW_POST, post.pk)]
+        )
+        self.assertEqual(
+            list(self.author.notifications.values_list('kind', 'comment')),
+            [(Notification.NEW_COMMENT, comment.pk)]
+        )
+        self.assertFalse(self.stranger.notifications.exists())
+        self.assertEqual(notifications.unread_count(self.reader), 1)
+
+    def test_inbox_marks_read(self):
+        Post.objects.create(text='Пост', author=self.author)
+        notifications.fan_out()
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertEqual(response.context['last_read_id'], 0)
+        self.assertEqual(notifications.unread_count(self.reader), 0)
+
+    def test_poll_returns_new_notifications(self):
+        url = reverse('posts:notifications_poll')
+        Post.objects.create(text='Пост', author=self.author)
+        notifications.fan_out()
+        data = self.client.get(url, {'since': 0}).json()
+        self.assertEqual(data['unread'], 1)
+        self.assertEqual(len(data['notifications']), 1)
+        self.assertEqual(data['notifications'][0]['actor'], 'author')
+        with override_settings(NOTIFICATIONS_POLL_TIMEOUT=0):
+            data = self.client.get(url, {'since': data['last_id']}).json()
+        self.assertEqual(data['notifications'], [])
+
+    @mock.patch.object(notifications.Watcher, 'ensure_thread')
+    def test_watcher_wakes_waiters(self, ensure_thread):
+        """Один опрос таблицы будит только получателей уведомлений."""
+        watcher = notifications.Watcher()
+        reader = watcher.register(self.reader.pk, limit=2)
+        stranger = watcher.register(self.stranger.pk, limit=2)
+        self.assertIsNone(watcher.register(self.author.pk, limit=2))
+        Post.objects.create(text='Пост', author=self.author)
+        notifications.fan_out()
+        with self.assertNumQueries(2):
+            watcher.poll()
+        self.assertTrue(reader.is_set())
+        self.assertFalse(stranger.is_set())
+        self.assertEqual(watcher.last_id, notifications.latest_id())
+        watcher.unregister(self.reader.pk, reader)
+        watcher.unregister(self.stranger.pk, stranger)
+        self.assertFalse(watcher.waiters)
+
+    @mock.patch.object(notifications.Watcher, 'ensure_thread')
+    def test_waiting_poll_fits_budget(self, ensure_thread):
+        """Ожидание не добавляет запросов: бюджет опроса постоянный."""
+        watcher = notifications.Watcher()
+        with enforce_budgets(), \
+                override_settings(NOTIFICATIONS_POLL_TIMEOUT=1), \
+                mock.patch.object(notifications, 'watcher', watcher):
+            response = self.client.get(
+                reverse('posts:notifications_poll'), {'since': 0}
+            )
+        self.assertEqual(response.json()['notifications'], [])
+        self.assertEqual(
+            len(response.query_usage.queries), response.query_budget.queries
+        )
+
+    def test_poll_is_refused_without_free_waiters(self):
+        with override_settings(NOTIFICATIONS_MAX_WAITERS=0):
+            response = self.client.get(
+                reverse('posts:notifications_poll'), {'since': 0}
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '30')
+
+    @mock.patch.object(notifications.Watcher, 'ensure_thread')
+    def test_wait_stops_when_client_leaves(self, ensure_thread):
+        disconnected = threading.Event()
+        disconnected.set()
+        started = time.monotonic()
+        self.assertEqual(notifications.wait(
+            self.reader, 0, timeout=25, disconnected=disconnected
+        ), [])
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertFalse(notifications.watcher.waiters)
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import recommendations
+from posts.models import Follow, Group, Post, SuggestionRefresh
+
+User = get_user_model()
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.friend_of_friend = User.objects.create_user(username='fof')
+        cls.neighbour = User.objects.create_user(username='neighbour')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.create(text='Пост', author=cls.reader, group=group)
+        Post.objects.create(text='Пост', author=cls.neighbour, group=group)
+
+    def setUp(self):
+        Follow.objects.create(user=self.reader, author=self.friend)
+        Follow.objects.create(user=self.friend, author=self.friend_of_friend)
+
+    def test_suggestions(self):
+        """Рекомендуются друзья друзей и соседи по группам."""
+        recommendations.refresh(full=True)
+        self.assertEqual(
+            [s.author for s in recommendations.for_user(self.reader)],
+            [self.friend_of_friend, self.neighbour]
+        )
+        self.assertFalse(SuggestionRefresh.objects.exists())
+
+    def test_incremental_refresh(self):
+        """Изменение подписок пересчитывает только затронутых."""
+        recommendations.refresh(full=True)
+        Follow.objects.create(user=self.reader, author=self.friend_of_friend)
+        self.assertEqual(
+            [s.author for s in recommendations.for_user(self.reader)],
+            [self.neighbour]
+        )
+        self.assertEqual(recommendations.stale_users(), [self.reader.pk])
+        self.assertEqual(recommendations.refresh(), 1)
+
+    def test_follow_index_shows_suggestions(self):
+        recommendations.refresh(full=True)
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(len(response.context['suggestions']), 2)
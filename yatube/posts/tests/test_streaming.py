@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class StreamingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Первый пост', author=cls.author, group=cls.group
+        )
+        Post.objects.create(text='Второй пост', author=cls.author)
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f'Комментарий {number}'
+            )
+
+    def test_post_detail_streams_comments(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response.context['post'], self.post)
+        html = response.getvalue().decode()
+        for number in range(3):
+            self.assertIn(f'Комментарий {number}', html)
+        self.assertNotIn('<!-- stream -->', html)
+        self.assertLess(
+            html.index('Комментарий 2'), html.index('Добавить комментарий')
+        )
+
+    def test_export_csv(self):
+        response = self.client.get(reverse(
+            'posts:profile_export', args=(self.author.username, 'csv')
+        ))
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(response.getvalue().decode())))
+        self.assertEqual(rows[0], ['id', 'pub_date', 'group', 'text', 'image'])
+        self.assertEqual(
+            [row[3] for row in rows[1:]], ['Первый пост', 'Второй пост']
+        )
+        self.assertEqual(rows[1][2], self.group.slug)
+
+    def test_export_jsonl(self):
+        response = self.client.get(reverse(
+            'posts:profile_export', args=(self.author.username, 'jsonl')
+        ))
+        rows = [
+            json.loads(line)
+            for line in response.getvalue().decode().splitlines()
+        ]
+        self.assertEqual(rows[0]['text'], 'Первый пост')
+        self.assertIsNone(rows[1]['group'])
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse(
+            'posts:profile_export', args=(self.author.username, 'xml')
+        ))
+        self.assertEqual(response.status_code, 404)
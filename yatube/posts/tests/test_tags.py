@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import tags
+from posts.models import Post, PostTag
+
+User = get_user_model()
+
+
+class TagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def post_tags(self, post):
+        return set(post.tags.values_list('tag', flat=True))
+
+    def test_tags_follow_post_text(self):
+        """Метки извлекаются при создании и обновляются при правке."""
+        self.client.post(reverse('posts:post_create'), {
+            'text': '#Django и #django, привет @reader и @nobody.',
+        })
+        post = Post.objects.get()
+        self.assertEqual(self.post_tags(post), {'django', '@reader'})
+        self.client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': 'Теперь про #python'}
+        )
+        self.assertEqual(self.post_tags(post), {'python'})
+
+    def test_tag_feed_keyset_pages(self):
+        posts = [
+            Post.objects.create(text=f'#тест {number}', author=self.author)
+            for number in range(12)
+        ]
+        Post.objects.create(text='Без меток', author=self.author)
+        url = reverse('posts:tag_feed', args=('Тест',))
+        response = self.client.get(url)
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 10)
+        self.assertTrue(page_obj.has_next())
+        response = self.client.get(url, {'after': page_obj.next_cursor})
+        self.assertEqual(
+            list(response.context['page_obj']), posts[1::-1]
+        )
+        link = reverse('posts:tag_feed', args=('тест',))
+        self.assertContains(response, f'<a href="{link}">#тест</a>')
+
+    def test_backfill_is_idempotent(self):
+        post = Post.objects.create(text='#старое @author', author=self.author)
+        PostTag.objects.all().delete()
+        for _ in range(2):
+            call_command(
+                'backfill_tags', workers=1, chunk_size=1, stdout=StringIO()
+            )
+        self.assertEqual(self.post_tags(post), {'старое', '@author'})
+        self.assertEqual(tags.chunks(1), [(post.pk, post.pk + 1)])
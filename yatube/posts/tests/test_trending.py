@@ -0,0 +1,87 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import (BatchCheckpoint, Comment, Follow, Post,
+                          PostTrend)
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.quiet_post = Post.objects.create(text='Тихий', author=cls.author)
+        cls.hot_post = Post.objects.create(text='Горячий', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_comments_raise_post(self):
+        """Комментарии поднимают пост в рейтинге."""
+        Comment.objects.bulk_create([
+            Comment(post=self.quiet_post, author=self.reader, text='Ок')
+        ] + [
+            Comment(post=self.hot_post, author=self.reader, text='Ого')
+            for _ in range(3)
+        ])
+        trending.update()
+        self.assertEqual(
+            trending.ranked_ids(), [self.hot_post.pk, self.quiet_post.pk]
+        )
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.hot_post, self.quiet_post]
+        )
+
+    def test_update_is_incremental(self):
+        """Повторный запуск не учитывает старые события ещё раз."""
+        now = timezone.now()
+        trending.update(now)
+        velocity = PostTrend.objects.get(post=self.hot_post).velocity
+        trending.update(now)
+        self.assertAlmostEqual(
+            PostTrend.objects.get(post=self.hot_post).velocity, velocity
+        )
+
+    def test_reach_and_decay(self):
+        """Подписчики автора увеличивают оценку, а время её снижает."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        now = timezone.now()
+        trending.update(now)
+        trend = PostTrend.objects.get(post=self.hot_post)
+        self.assertGreater(trend.score, trend.velocity)
+        trending.update(now + timezone.timedelta(seconds=trending.HALF_LIFE))
+        self.assertAlmostEqual(
+            PostTrend.objects.get(post=self.hot_post).velocity,
+            trend.velocity / 2
+        )
+
+    def test_failed_update_changes_nothing(self):
+        """Упавший запуск не оставляет затухание без сдвига отметки."""
+        now = timezone.now()
+        trending.update(now)
+        velocity = PostTrend.objects.get(post=self.hot_post).velocity
+        Comment.objects.create(
+            post=self.hot_post, author=self.reader, text='Ещё'
+        )
+        later = now + timezone.timedelta(seconds=trending.HALF_LIFE)
+        with mock.patch.object(trending, '_apply', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                trending.update(later)
+        self.assertAlmostEqual(
+            PostTrend.objects.get(post=self.hot_post).velocity, velocity
+        )
+        self.assertEqual(
+            BatchCheckpoint.objects.get(name=trending.CHECKPOINT).position,
+            now
+        )
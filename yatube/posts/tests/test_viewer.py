@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ViewerContextTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.own_post = Post.objects.create(
+            text='Свой пост', author=cls.reader, group=cls.group
+        )
+        cls.post = Post.objects.create(
+            text='Чужой пост', author=cls.author, group=cls.group
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ок')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def state(self, **params):
+        return self.client.get(reverse('posts:viewer'), params).json()
+
+    def test_flags(self):
+        """Карточки получают флаги зрителя."""
+        state = self.state(post=[self.own_post.pk, self.post.pk])
+        own_post = state['posts'][str(self.own_post.pk)]
+        post = state['posts'][str(self.post.pk)]
+        self.assertTrue(own_post['can_edit'])
+        self.assertFalse(own_post['commented'])
+        self.assertFalse(post['can_edit'])
+        self.assertTrue(post['follows_author'])
+        self.assertTrue(post['commented'])
+        self.assertIn(self.reader.username, state['header'])
+        self.assertTrue(state['csrf_token'])
+
+    def test_profile_following_is_per_viewer(self):
+        """Кнопка подписки зависит от зрителя, а не от чужих подписок."""
+        self.assertEqual(
+            self.state(author=self.author.pk)['following'], [self.author.pk]
+        )
+        self.client.force_login(self.author)
+        self.assertEqual(self.state(author=self.reader.pk)['following'], [])
+
+    def test_guest_state_is_empty(self):
+        self.client.logout()
+        with CaptureQueriesContext(connection) as queries:
+            state = self.state(post=self.post.pk)
+        self.assertEqual(state, {'authenticated': False})
+        self.assertEqual(len(queries), 0)
+
+    def test_queries_do_not_grow_with_cards(self):
+        """Число запросов не зависит от количества карточек."""
+        with CaptureQueriesContext(connection) as few:
+            self.state(post=[self.post.pk])
+        posts = [
+            Post.objects.create(
+                text='Ещё пост', author=self.author, group=self.group
+            )
+            for _ in range(5)
+        ]
+        with CaptureQueriesContext(connection) as many:
+            self.state(post=[self.post.pk] + [post.pk for post in posts])
+        self.assertEqual(len(few), len(many))
@@ -6,6 +6,7 @@ from django.core.cache import cache
 from django.conf import settings
 import shutil
 import tempfile
+from unittest import mock
 from django.core.files.uploadedfile import SimpleUploadedFile
 from posts.models import Post, Group, Comment, Follow
 
@@ -271,3 +272,85 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(len(response.context['page_obj']), 10)
                 response = self.client.get(paginator + '?page=2')
                 self.assertEqual(len(response.context['page_obj']), 3)
+
+
+class GroupIndexViewsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other_user = User.objects.create_user(username='other')
+        cls.quiet_group = Group.objects.create(
+            title='Тихая группа', slug='quiet', description='Описание',
+        )
+        cls.group = Group.objects.create(
+            title='Активная группа', slug='active', description='Описание',
+        )
+
+    def test_stats_follow_posts(self):
+        """Статистика группы обновляется при создании, правке и удалении."""
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.group
+        )
+        Post.objects.create(text='Пост', author=self.user, group=self.group)
+        Post.objects.create(
+            text='Пост', author=self.other_user, group=self.group
+        )
+        self.group.stats.refresh_from_db()
+        self.assertEqual(self.group.stats.post_count, 3)
+        post.group = self.quiet_group
+        post.save()
+        self.group.stats.refresh_from_db()
+        self.quiet_group.stats.refresh_from_db()
+        self.assertEqual(self.group.stats.post_count, 2)
+        self.assertEqual(self.quiet_group.stats.post_count, 1)
+        post.delete()
+        self.quiet_group.stats.refresh_from_db()
+        self.assertEqual(self.quiet_group.stats.post_count, 0)
+
+    def test_group_index_sorted_by_activity(self):
+        """Каталог групп отсортирован по последней активности."""
+        Post.objects.create(text='Пост', author=self.user, group=self.group)
+        Post.objects.create(
+            text='Пост', author=self.other_user, group=self.group
+        )
+        Post.objects.create(text='Пост', author=self.user, group=self.group)
+        response = self.client.get(reverse('posts:group_index'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(
+            [stats.group for stats in page_obj],
+            [self.group, self.quiet_group]
+        )
+        self.assertEqual(
+            [row.author for row in page_obj[0].top_authors],
+            [self.user, self.other_user]
+        )
+        self.assertFalse(page_obj.has_next())
+
+    def test_group_index_keyset_pages(self):
+        """Следующая страница каталога начинается после курсора."""
+        with mock.patch('posts.views.GROUPS_PER_PAGE', 1):
+            response = self.client.get(reverse('posts:group_index'))
+            page_obj = response.context['page_obj']
+            self.assertTrue(page_obj.has_next())
+            response = self.client.get(
+                reverse('posts:group_index'),
+                {'after': page_obj.next_cursor}
+            )
+        self.assertEqual(
+            [stats.group for stats in response.context['page_obj']],
+            [self.quiet_group]
+        )
+
+    def test_malformed_cursor_starts_from_first_page(self):
+        """Курсор с несуществующей датой не роняет страницу."""
+        response = self.client.get(
+            reverse('posts:group_index'),
+            {'after': '2020-13-45T00:00:00_1'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [stats.group for stats in response.context['page_obj']],
+            [self.group, self.quiet_group]
+        )
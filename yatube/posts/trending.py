@@ -0,0 +1,134 @@
+import math
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import BatchCheckpoint, Comment, Follow, Post, PostTrend
+
+CHECKPOINT = 'trending'
+CACHE_KEY = 'trending:ids'
+CACHE_TIMEOUT = 60 * 5
+HALF_LIFE = 6 * 60 * 60
+DECAY = math.log(2) / HALF_LIFE
+FIRST_RUN_WINDOW = 48 * 60 * 60
+MIN_VELOCITY = 0.01
+POST_WEIGHT = 1
+COMMENT_WEIGHT = 2
+REACH_WEIGHT = 0.5
+TRENDING_SIZE = 200
+
+
+def decay_factor(seconds):
+    return math.exp(-DECAY * max(seconds, 0))
+
+
+def reach_factor(followers):
+    return 1 + REACH_WEIGHT * math.log1p(followers)
+
+
+def _activity(model, date_field, group_field, since, until):
+    """Считает события по постам, сгруппированные по часам.
+
+    Агрегация выполняется в базе одним запросом, поэтому стоимость
+    зависит от числа затронутых постов, а не от числа событий.
+    """
+    return (
+        model.objects
+        .filter(**{
+            f'{date_field}__gt': since,
+            f'{date_field}__lte': until,
+            f'{group_field}__isnull': False,
+        })
+        .annotate(hour=TruncHour(date_field))
+        .values_list(group_field, 'hour')
+        .annotate(events=Count('pk'))
+        .order_by()
+    )
+
+
+def update(now=None):
+    """Применяет к оценкам всё, что произошло с прошлого запуска.
+
+    Затухание, новые события и сдвиг отметки — одна транзакция:
+    упавший на середине запуск не применит затухание дважды.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        checkpoint, created = (
+            BatchCheckpoint.objects.select_for_update().get_or_create(
+                name=CHECKPOINT,
+                defaults={'position': now - timezone.timedelta(
+                    seconds=FIRST_RUN_WINDOW
+                )}
+            )
+        )
+        since = checkpoint.position
+        factor = decay_factor((now - since).total_seconds())
+        PostTrend.objects.update(
+            velocity=F('velocity') * factor, score=F('score') * factor
+        )
+        PostTrend.objects.filter(velocity__lt=MIN_VELOCITY).delete()
+
+        increments = {}
+        sources = (
+            (Post, 'pub_date', 'pk', POST_WEIGHT),
+            (Comment, 'created', 'post', COMMENT_WEIGHT),
+        )
+        for model, date_field, group_field, weight in sources:
+            for post_id, hour, events in _activity(
+                model, date_field, group_field, since, now
+            ):
+                age = (now - max(hour, since)).total_seconds()
+                increments[post_id] = (
+                    increments.get(post_id, 0)
+                    + weight * events * decay_factor(age)
+                )
+        if increments:
+            _apply(increments)
+        checkpoint.position = now
+        checkpoint.save(update_fields=['position'])
+    ids = ranked_ids_from_db()
+    cache.set(CACHE_KEY, ids, CACHE_TIMEOUT)
+    return len(increments)
+
+
+def _apply(increments):
+    posts = dict(
+        Post.objects.filter(pk__in=increments).values_list('pk', 'author')
+    )
+    followers = dict(
+        Follow.objects.filter(author__in=set(posts.values()))
+        .values_list('author')
+        .annotate(total=Count('pk'))
+        .order_by()
+    )
+    trends = PostTrend.objects.in_bulk(list(posts))
+    new_trends = []
+    for post_id, author_id in posts.items():
+        trend = trends.get(post_id)
+        if trend is None:
+            trend = PostTrend(post_id=post_id)
+            new_trends.append(trend)
+        trend.velocity += increments[post_id]
+        trend.score = trend.velocity * reach_factor(
+            followers.get(author_id, 0)
+        )
+    PostTrend.objects.bulk_create(new_trends)
+    PostTrend.objects.bulk_update(
+        [trend for trend in trends.values()], ['velocity', 'score']
+    )
+
+
+def ranked_ids_from_db():
+    return list(
+        PostTrend.objects.order_by('-score', '-post_id')
+        .values_list('post_id', flat=True)[:TRENDING_SIZE]
+    )
+
+
+def ranked_ids():
+    """Список id популярных постов: одно чтение из кэша."""
+    return cache.get_or_set(CACHE_KEY, ranked_ids_from_db, CACHE_TIMEOUT)
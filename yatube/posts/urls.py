@@ -5,8 +5,37 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending_index, name='trending'),
+    path('groups/', views.group_index, name='group_index'),
+    path('viewer/', views.viewer_state, name='viewer'),
     path('group/<slug>/', views.group_posts, name='group_list'),
+    path('tags/<str:tag>/', views.tag_feed, name='tag_feed'),
+    path(
+        'group/<slug>/archive/',
+        views.group_archive,
+        name='group_archive'
+    ),
+    path(
+        'group/<slug>/archive/<int:year>/<int:month>/',
+        views.group_archive,
+        name='group_archive_month'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/archive/',
+        views.profile_archive,
+        name='profile_archive'
+    ),
+    path(
+        'profile/<str:username>/archive/<int:year>/<int:month>/',
+        views.profile_archive,
+        name='profile_archive_month'
+    ),
+    path(
+        'profile/<str:username>/export.<str:fmt>',
+        views.profile_export,
+        name='profile_export'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -16,6 +45,29 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('stream/', views.feed_stream, name='feed_stream'),
+    path(
+        'stream/group/<slug>/',
+        views.feed_stream,
+        {'feed': 'group'},
+        name='group_stream'
+    ),
+    path(
+        'stream/follow/',
+        views.feed_stream,
+        {'feed': 'follow'},
+        name='follow_stream'
+    ),
+    path(
+        'notifications/',
+        views.notifications_index,
+        name='notifications'
+    ),
+    path(
+        'notifications/poll/',
+        views.notifications_poll,
+        name='notifications_poll'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -0,0 +1,112 @@
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import parse_http_date_safe
+from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
+
+from .models import FeedVersion, Group, Post, User
+
+
+def bump(*keys):
+    """Увеличивает версии лент, содержимое которых изменилось."""
+    keys = {key for key in keys if key is not None}
+    FeedVersion.objects.bulk_create(
+        [FeedVersion(key=key) for key in keys], ignore_conflicts=True
+    )
+    FeedVersion.objects.filter(key__in=keys).update(
+        version=F('version') + 1, updated=timezone.now()
+    )
+
+
+def post_keys(post_id, author_id, group_id):
+    """Ленты, на которых виден пост."""
+    return (
+        'index',
+        f'post:{post_id}',
+        f'author:{author_id}',
+        f'group:{group_id}' if group_id else None,
+    )
+
+
+def index_keys():
+    return ('index',)
+
+
+def group_keys(slug, **kwargs):
+    group_id = Group.objects.filter(slug=slug).values_list('pk', flat=True)
+    return [f'group:{pk}' for pk in group_id]
+
+
+def profile_keys(username, **kwargs):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    )
+    return [f'author:{pk}' for pk in author_id]
+
+
+def post_detail_keys(post_id):
+    # На странице поста виден и счётчик постов автора.
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author', flat=True
+    )
+    return [f'post:{post_id}'] + [f'author:{pk}' for pk in author_id]
+
+
+def _state(request, keys):
+    """Версии лент страницы: один запрос, результат запоминается."""
+    if not hasattr(request, '_feed_state'):
+        rows = FeedVersion.objects.filter(key__in=keys).order_by('key')
+        request._feed_state = (
+            '-'.join(f'{row.key}.{row.version}' for row in rows),
+            max((row.updated for row in rows), default=None),
+        )
+    return request._feed_state
+
+
+def conditional_feed(keys_func, cache_timeout=None):
+    """Валидаторы ETag/Last-Modified и заголовки общего кэша.
+
+    Страница — общая для всех зрителей оболочка: представление
+    не читает ни request.user, ни сессию, поэтому ответ не зависит
+    от cookie и его можно отдавать всем из кэша обратного прокси
+    на SHARED_CACHE_SECONDS. Валидаторы берутся из версий лент,
+    и 304 отдаётся без рендеринга. Если задан cache_timeout,
+    страница ещё и кэшируется как cache_page; валидаторы при этом
+    сохраняются вместе с ответом, чтобы устаревшая копия
+    не получила ETag свежей версии.
+    """
+    def etag(request, *args, **kwargs):
+        return _state(request, keys_func(*args, **kwargs))[0] or None
+
+    def last_modified(request, *args, **kwargs):
+        return _state(request, keys_func(*args, **kwargs))[1]
+
+    def decorator(view_func):
+        inner = condition(etag, last_modified)(view_func)
+        if cache_timeout is not None:
+            inner = cache_page(cache_timeout)(inner)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = inner(request, *args, **kwargs)
+            response = get_conditional_response(
+                request,
+                etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    response.get('Last-Modified')
+                ),
+                response=response,
+            )
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=0,
+                s_maxage=settings.SHARED_CACHE_SECONDS,
+            )
+            return response
+        return wrapper
+    return decorator
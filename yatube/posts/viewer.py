@@ -0,0 +1,82 @@
+from collections import namedtuple
+
+from django.contrib.auth.models import AnonymousUser
+from django.shortcuts import render
+
+from .models import Comment, Follow
+
+PostViewer = namedtuple(
+    'PostViewer', ['can_edit', 'follows_author', 'commented']
+)
+ANONYMOUS = PostViewer(can_edit=False, follows_author=False, commented=False)
+
+
+class ViewerContext:
+    """Всё, что зависит от зрителя, для набора показанных постов.
+
+    Считается одним проходом на запрос: не больше двух запросов
+    независимо от числа карточек. Каждому посту проставляется
+    атрибут viewer, поэтому шаблоны сами в базу не обращаются.
+    """
+
+    def __init__(self, user, posts, author_ids=()):
+        self.user = user
+        self.posts = list(posts)
+        self.followed_author_ids = set()
+        self.commented_post_ids = set()
+        if user.is_authenticated:
+            self._load(author_ids)
+        for post in self.posts:
+            post.viewer = self.for_post(post)
+
+    def _load(self, extra_author_ids):
+        author_ids = {post.author_id for post in self.posts}
+        author_ids.update(extra_author_ids)
+        author_ids.discard(self.user.pk)
+        if author_ids:
+            self.followed_author_ids = set(
+                Follow.objects.filter(
+                    user=self.user, author__in=author_ids
+                ).values_list('author', flat=True)
+            )
+        if self.posts:
+            self.commented_post_ids = set(
+                Comment.objects.filter(
+                    author=self.user, post__in=[post.pk for post in self.posts]
+                ).values_list('post', flat=True)
+            )
+
+    def follows(self, author):
+        return author.pk in self.followed_author_ids
+
+    def for_post(self, post):
+        if not self.user.is_authenticated:
+            return ANONYMOUS
+        return PostViewer(
+            can_edit=post.author_id == self.user.pk,
+            follows_author=post.author_id in self.followed_author_ids,
+            commented=post.pk in self.commented_post_ids,
+        )
+
+
+def for_page(user, page_obj, author_ids=()):
+    """Считает контекст зрителя для страницы пагинатора.
+
+    Список объектов страницы материализуется, чтобы шаблон получил
+    те же экземпляры, которым проставлен атрибут viewer.
+    """
+    page_obj.object_list = list(page_obj.object_list)
+    return ViewerContext(user, page_obj.object_list, author_ids)
+
+
+def shell_context(context):
+    """Контекст оболочки страницы, одинаковой для всех зрителей.
+
+    Шаблон видит гостя, а личные части страницы заполняет скрипт
+    posts/viewer.js по ответу viewer_state.
+    """
+    return {**context, 'user': AnonymousUser(), 'shell': True}
+
+
+def render_shell(request, template_name, context):
+    return render(request, template_name, shell_context(context))
@@ -1,57 +1,315 @@
+from django.conf import settings
+from django.http import (Http404, HttpResponse, HttpResponseForbidden,
+                         JsonResponse, StreamingHttpResponse)
+from django.middleware.csrf import get_token
 from django.shortcuts import render, get_object_or_404, redirect
-from .paginate import pagination
-from .models import Post, Group, User, Comment, Follow
+from django.urls import reverse
+from django.template.loader import render_to_string
+from django.views.decorators.cache import never_cache
+from .paginate import pagination, keyset_pagination
+from .models import Post, Group, User, Comment, Follow, GroupStats, PostTag
+from . import (analytics, archive, broker, counters, group_stats,
+               notifications, recommendations, tags, trending)
+from .viewer import ViewerContext, for_page, render_shell, shell_context
+from .versions import (conditional_feed, group_keys, index_keys,
+                       post_detail_keys, profile_keys)
 from django.contrib.auth.decorators import login_required
 from .forms import PostForm, CommentForm
-from django.views.decorators.cache import cache_page
+from core.asgi import DISCONNECTED
+from core.querybudget import query_budget
+from core.ratelimit import ratelimit
+from core.streaming import (CHUNK_SIZE, stream_csv, stream_jsonl,
+                            stream_render)
 
 PER_PAGE = 10
+GROUPS_PER_PAGE = 20
+VIEWER_MAX_IDS = 100
+# Через столько секунд клиенту повторить опрос, если мест нет.
+POLL_RETRY_AFTER = 30
 
 
-@cache_page(20)
+def with_counts(page_obj):
+    """Число комментариев для карточек страницы."""
+    page_obj.object_list = list(page_obj.object_list)
+    counters.attach(page_obj.object_list, counters.COMMENTS, 'comment_count')
+    return page_obj
+
+
+@query_budget(5, ms=100)
+@conditional_feed(index_keys, cache_timeout=20)
 def index(request):
-    posts = Post.objects.all().order_by('-pub_date')
+    posts = Post.objects.select_related('author', 'group').order_by(
+        '-pub_date'
+    )
     template = 'posts/index.html'
-    return render(request, template, {
-        'page_obj': pagination(request, posts, PER_PAGE)}
+    page_obj = with_counts(pagination(request, posts, PER_PAGE))
+    return render_shell(request, template, {'page_obj': page_obj})
+
+
+@query_budget(4)
+def trending_index(request):
+    page_obj = pagination(request, trending.ranked_ids(), PER_PAGE)
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        page_obj.object_list
     )
+    page_obj.object_list = [
+        posts[post_id] for post_id in page_obj.object_list
+        if post_id in posts
+    ]
+    with_counts(page_obj)
+    return render(request, 'posts/trending.html', {
+        'page_obj': page_obj,
+        'viewer': for_page(request.user, page_obj),
+    })
 
 
+@query_budget(8, ms=100)
+@conditional_feed(group_keys)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    return render(
+    post_list = group.posts.select_related('author')
+    page_obj = with_counts(pagination(request, post_list, PER_PAGE))
+    return render_shell(
         request,
         'posts/group_list.html',
-        {'group': group, 'page_obj': pagination(request, post_list, PER_PAGE)}
+        {
+            'group': group,
+            'page_obj': page_obj,
+        }
+    )
+
+
+@query_budget(6)
+def group_index(request):
+    stats = GroupStats.objects.select_related('group')
+    page_obj = keyset_pagination(
+        request, stats, GROUPS_PER_PAGE, field='last_activity'
     )
+    authors = group_stats.top_authors([row.group_id for row in page_obj])
+    for row in page_obj:
+        row.top_authors = authors[row.group_id]
+    return render(request, 'posts/group_index.html', {'page_obj': page_obj})
 
 
+@query_budget(4)
+def tag_feed(request, tag):
+    """Посты с хештегом или упоминанием пользователя (@имя)."""
+    tag = tags.normalize(tag)
+    page_obj = keyset_pagination(
+        request,
+        PostTag.objects.filter(tag=tag).select_related(
+            'post__author', 'post__group'
+        ),
+        PER_PAGE
+    )
+    page_obj.object_list = [row.post for row in page_obj]
+    with_counts(page_obj)
+    return render_shell(request, 'posts/tag_feed.html', {
+        'tag': tag,
+        'page_obj': page_obj,
+    })
+
+
+@query_budget(11, ms=100)
+@conditional_feed(profile_keys)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    following = author.following.exists()
+    post_list = author.posts.select_related('group')
+    page_obj = with_counts(pagination(request, post_list, PER_PAGE))
     context = {
-        'page_obj': pagination(request, post_list, PER_PAGE),
+        'page_obj': page_obj,
         'author': author,
-        "following": following,
+        'views': analytics.author_summary(author),
     }
-    return render(request, 'posts/profile.html', context)
+    return render_shell(request, 'posts/profile.html', context)
 
 
+@query_budget(8, ms=100)
+@conditional_feed(post_detail_keys)
 def post_detail(request, post_id):
     form = CommentForm(request.POST or None)
-    post = get_object_or_404(Post, id=post_id)
-    comments = Comment.objects.filter(post=post)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id
+    )
+    post.view_count = counters.get(counters.VIEWS, post.pk)
+    comments = Comment.objects.filter(post=post).select_related('author')
     context = {
         "post": post,
         "form": form,
         "comments": comments,
     }
-    return render(request, "posts/post_detail.html", context)
+    # Ветка комментариев не ограничена по длине, поэтому страница
+    # отдаётся потоком, а комментарии читаются итератором.
+    return stream_render(
+        request,
+        "posts/post_detail.html",
+        shell_context(context),
+        comments.iterator(chunk_size=CHUNK_SIZE),
+        "includes/comment_item.html",
+        "comment",
+    )
+
+
+def _archive(request, key, posts, context, year=None, month=None):
+    """Месяцы архива, а с year и month — посты одного месяца.
+
+    Месяцы берутся из готовых счётчиков, посты месяца — запросом
+    по диапазону дат, который обслуживает индекс (автор или группа,
+    дата), так что старые записи не дальше пары переходов.
+    """
+    if year is None:
+        context['years'] = archive.years(key)
+        return render_shell(request, 'posts/archive.html', context)
+    bounds = archive.month_range(year, month)
+    if bounds is None:
+        raise Http404
+    start, end = bounds
+    page_obj = with_counts(keyset_pagination(
+        request, posts.filter(pub_date__gte=start, pub_date__lt=end),
+        PER_PAGE
+    ))
+    previous, following = archive.neighbours(key, start.date())
+    context.update(
+        page_obj=page_obj, month=start, previous=previous, next=following
+    )
+    return render_shell(request, 'posts/archive_month.html', context)
+
+
+@query_budget(9)
+@conditional_feed(profile_keys)
+def profile_archive(request, username, year=None, month=None):
+    author = get_object_or_404(User, username=username)
+    return _archive(
+        request,
+        f'author:{author.pk}',
+        author.posts.select_related('group'),
+        {
+            'title': author.get_full_name() or author.username,
+            'owner_url': reverse('posts:profile', args=(author.username,)),
+            'archive_index': reverse(
+                'posts:profile_archive', args=(author.username,)
+            ),
+            'archive_url': 'posts:profile_archive_month',
+            'archive_arg': author.username,
+        },
+        year,
+        month,
+    )
+
+
+@query_budget(9)
+@conditional_feed(group_keys)
+def group_archive(request, slug, year=None, month=None):
+    group = get_object_or_404(Group, slug=slug)
+    return _archive(
+        request,
+        f'group:{group.pk}',
+        group.posts.select_related('author', 'group'),
+        {
+            'title': group.title,
+            'owner_url': reverse('posts:group_list', args=(group.slug,)),
+            'archive_index': reverse(
+                'posts:group_archive', args=(group.slug,)
+            ),
+            'archive_url': 'posts:group_archive_month',
+            'archive_arg': group.slug,
+        },
+        year,
+        month,
+    )
+
+
+EXPORT_FIELDS = ('id', 'pub_date', 'group', 'text', 'image')
+
+
+@query_budget(5)
+@ratelimit('5/m', methods=None)
+def profile_export(request, username, fmt):
+    """Все посты автора файлом CSV или JSON Lines.
+
+    Строки читаются итератором и сразу пишутся в ответ, поэтому
+    память не зависит от числа постов.
+    """
+    if fmt not in ('csv', 'jsonl'):
+        raise Http404
+    author = get_object_or_404(User, username=username)
+    rows = author.posts.order_by('pub_date', 'pk').values_list(
+        'pk', 'pub_date', 'group__slug', 'text', 'image'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    filename = f'{author.username}.{fmt}'
+    if fmt == 'csv':
+        return stream_csv(rows, EXPORT_FIELDS, filename)
+    return stream_jsonl(
+        (dict(zip(EXPORT_FIELDS, row)) for row in rows), filename
+    )
+
+
+def _ids(request, name):
+    return [
+        int(value) for value in request.GET.getlist(name)[:VIEWER_MAX_IDS]
+        if value.isdigit()
+    ]
+
+
+def _viewer_key(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return '{}|{}'.format(
+        request.META.get('REMOTE_ADDR', ''),
+        request.META.get('HTTP_USER_AGENT', '')
+    )
+
+
+@query_budget(9)
+@never_cache
+def viewer_state(request):
+    """Личные части общей страницы одним запросом.
+
+    Скрипт страницы передаёт id показанных постов и авторов,
+    в ответе — шапка, флаги карточек, подписки, токен CSRF
+    и рекомендации. Для гостя оболочка уже готова, и в базу
+    представление не обращается.
+
+    Открытый пост (viewed) учитывается здесь, а не в post_detail:
+    страницу поста может отдать кэш, а этот запрос доходит всегда.
+    """
+    viewed = request.GET.get('viewed', '')
+    if viewed.isdigit():
+        analytics.buffer.record(
+            int(viewed), _viewer_key(request), request.GET.get('ref')
+        )
+    if not request.user.is_authenticated:
+        return JsonResponse({'authenticated': False})
+    posts = Post.objects.filter(pk__in=_ids(request, 'post'))
+    viewer = ViewerContext(request.user, posts, _ids(request, 'author'))
+    unread = notifications.unread_count(request.user)
+    state = {
+        'authenticated': True,
+        'header': render_to_string('includes/header.html', {
+            'current_view': request.GET.get('view'),
+            'unread_notifications': unread,
+        }, request=request),
+        'csrf_token': get_token(request),
+        'posts': {post.pk: post.viewer._asdict() for post in viewer.posts},
+        'following': sorted(viewer.followed_author_ids),
+        'unread': unread,
+        'last_notification_id': request.user.notifications.values_list(
+            'pk', flat=True
+        ).first() or 0,
+        'notifications_url': reverse('posts:notifications_poll'),
+    }
+    if 'suggestions' in request.GET:
+        state['suggestions'] = render_to_string(
+            'includes/suggestions.html',
+            {'suggestions': recommendations.for_user(request.user)},
+            request=request,
+        )
+    return JsonResponse(state)
 
 
+@query_budget(14)
 @login_required
+@ratelimit('10/m')
 def post_create(request):
     groups = Group.objects.all()
     if request.method == "POST":
@@ -69,6 +327,7 @@ def post_create(request):
         })
 
 
+@query_budget(17)
 @login_required
 def post_edit(request, post_id):
     groups = Group.objects.all()
@@ -90,7 +349,9 @@ def post_edit(request, post_id):
     })
 
 
+@query_budget(11)
 @login_required
+@ratelimit('20/m')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -102,16 +363,24 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@query_budget(9)
 @login_required
 def follow_index(request):
-    post = Post.objects.select_related("author").filter(
+    post = Post.objects.select_related("author", "group").filter(
         author__following__user=request.user
     )
-    context = {"page_obj": pagination(request, post, PER_PAGE)}
+    page_obj = with_counts(pagination(request, post, PER_PAGE))
+    context = {
+        "page_obj": page_obj,
+        "viewer": for_page(request.user, page_obj),
+        "suggestions": recommendations.for_user(request.user),
+    }
     return render(request, "posts/follow.html", context)
 
 
+@query_budget(12)
 @login_required
+@ratelimit('30/m', methods=None)
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
@@ -119,9 +388,115 @@ def profile_follow(request, username):
     return redirect("posts:profile", username)
 
 
+@query_budget(8)
 @login_required
+@ratelimit('30/m', methods=None)
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     if Follow.objects.get(user=request.user, author=author):
         Follow.objects.get(user=request.user, author=author).delete()
     return redirect("posts:profile", username)
+
+
+@query_budget(8)
+@login_required
+def notifications_index(request):
+    page_obj = pagination(
+        request,
+        request.user.notifications.select_related(
+            'post__author', 'comment__author'
+        ),
+        PER_PAGE
+    )
+    page_obj.object_list = list(page_obj.object_list)
+    last_read_id = notifications.mark_read(request.user)
+    return render(request, 'posts/notifications.html', {
+        'page_obj': page_obj,
+        'last_read_id': last_read_id,
+    })
+
+
+def _notification_json(notification):
+    actor = (notification.comment or notification.post).author
+    return {
+        'id': notification.pk,
+        'kind': notification.kind,
+        'text': notification.get_kind_display(),
+        'actor': actor.username,
+        'url': reverse('posts:post_detail', args=(notification.post_id,)),
+        'created': notification.created,
+    }
+
+
+# Сессия, пользователь, уведомления до и после ожидания, отметка
+# Watcher при первом ожидании в процессе и число непрочитанных.
+@query_budget(6)
+@login_required
+@never_cache
+def notifications_poll(request):
+    """Долгий опрос: ответ приходит, как только появятся уведомления.
+
+    Клиент передаёт since — id последнего полученного уведомления.
+    Если ожидающих в процессе уже слишком много, ответ — 503
+    с Retry-After.
+    """
+    since = request.GET.get('since', '')
+    since = int(since) if since.isdigit() else 0
+    new = notifications.wait(
+        request.user, since, disconnected=request.META.get(DISCONNECTED)
+    )
+    if new is None:
+        response = JsonResponse({'retry': POLL_RETRY_AFTER}, status=503)
+        response['Retry-After'] = POLL_RETRY_AFTER
+        return response
+    return JsonResponse({
+        'unread': notifications.unread_count(request.user),
+        'last_id': max((item.pk for item in new), default=since),
+        'notifications': [_notification_json(item) for item in new],
+    })
+
+
+@query_budget(6)
+def feed_stream(request, feed='index', slug=None):
+    """Живое обновление ленты: SSE с id новых постов.
+
+    Клиент показывает «есть новые записи» вместо того, чтобы
+    перезагружать страницу мимо кэша. Каждое соединение занимает
+    поток воркера, поэтому поток открыт только пользователям,
+    и одновременно их не больше LIVE_FEED_MAX_STREAMS на процесс;
+    сверх этого — 503 с просьбой переподключиться позже.
+    """
+    if not request.user.is_authenticated:
+        return HttpResponseForbidden()
+    if feed == 'group':
+        group = get_object_or_404(Group, slug=slug)
+        channel_set = {f'group:{group.pk}'}
+    elif feed == 'follow':
+        channel_set = {
+            f'author:{author_id}' for author_id in Follow.objects.filter(
+                user=request.user
+            ).values_list('author', flat=True)
+        }
+    else:
+        channel_set = {'index'}
+    subscription = broker.broker.subscribe(
+        channel_set, limit=settings.LIVE_FEED_MAX_STREAMS
+    )
+    if subscription is None:
+        response = HttpResponse(
+            f'retry: {broker.BUSY_RETRY * 1000}\n\n',
+            content_type='text/event-stream', status=503
+        )
+        response['Retry-After'] = broker.BUSY_RETRY
+        return response
+    last_event_id = request.META.get('HTTP_LAST_EVENT_ID', '')
+    response = StreamingHttpResponse(
+        broker.EventStream(
+            subscription,
+            int(last_event_id) if last_event_id.isdigit() else None,
+        ),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .models import OutgoingEmail
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'subject', 'to', 'status', 'attempts',
+                    'next_attempt', 'sent')
+    list_filter = ('status',)
+    search_fields = ('to', 'cc', 'bcc', 'subject')
+    readonly_fields = ('created', 'sent', 'last_error')
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
@@ -0,0 +1,70 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+PASSWORD = 'bench-password-1234'
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет стоимость хешеров паролей и число входов в секунду '
+        'на одно ядро для текущего движка сессий.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--logins', type=int, default=20,
+            help='Сколько входов выполнить для каждого хешера.'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Движок сессий: {settings.SESSION_ENGINE}')
+        for hasher_path in settings.PASSWORD_HASHERS:
+            algorithm = hasher_path.rsplit('.', 1)[-1]
+            with override_settings(PASSWORD_HASHERS=[hasher_path]):
+                try:
+                    hasher = get_hasher()
+                    encoded = hasher.encode(PASSWORD, hasher.salt())
+                except ValueError as error:
+                    self.stdout.write(f'{algorithm}: пропущен ({error})')
+                    continue
+                verify_ms = self._time(
+                    lambda: hasher.verify(PASSWORD, encoded)
+                ) * 1000
+                logins_per_second = self._logins(options['logins'])
+            self.stdout.write(
+                f'{algorithm}: проверка пароля {verify_ms:.1f} мс, '
+                f'{logins_per_second:.1f} входов/с на ядро'
+            )
+
+    def _time(self, func, repeat=5):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat
+
+    def _logins(self, count):
+        """Выполняет входы одним потоком и откатывает созданные данные."""
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username='bench-auth-user', password=PASSWORD
+            )
+            client = Client()
+            url = reverse('users:login')
+            data = {'username': user.username, 'password': PASSWORD}
+            started = time.perf_counter()
+            for _ in range(count):
+                response = client.post(url, data)
+                assert response.status_code == 302, response.status_code
+                client.cookies.clear()
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return count / elapsed
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users import outbox
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пачками с повторными попытками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=outbox.BATCH_SIZE,
+            help='Сколько писем отправлять через одно соединение.'
+        )
+        parser.add_argument(
+            '--loop', type=float, metavar='SECONDS',
+            help='Работать постоянно, опрашивая очередь с этим интервалом.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = outbox.deliver(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено: {sent}, не удалось: {failed}'
+                )
+            if options['loop'] is None:
+                break
+            if sent + failed < options['batch_size']:
+                time.sleep(options['loop'])
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_outbox'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='outgoingemail',
+            old_name='recipients',
+            new_name='to',
+        ),
+        migrations.AlterField(
+            model_name='outgoingemail',
+            name='to',
+            field=models.TextField(verbose_name='Кому'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='cc',
+            field=models.TextField(blank=True, verbose_name='Копия'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='bcc',
+            field=models.TextField(blank=True, verbose_name='Скрытая копия'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='message',
+            field=models.BinaryField(default=b'', verbose_name='MIME'),
+        ),
+    ]
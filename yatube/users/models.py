@@ -0,0 +1,44 @@
+from django.db import models
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не удалось отправить'),
+    )
+
+    subject = models.CharField('Тема', max_length=998)
+    body = models.TextField('Текст')
+    html_body = models.TextField('HTML-версия', blank=True)
+    from_email = models.CharField('Отправитель', max_length=254)
+    to = models.TextField('Кому')
+    cc = models.TextField('Копия', blank=True)
+    bcc = models.TextField('Скрытая копия', blank=True)
+    # Письмо целиком, как его собрал Django: заголовки, Reply-To,
+    # вложения и альтернативы. Bcc в нём нет — только в поле bcc.
+    message = models.BinaryField('MIME', default=b'')
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUS_CHOICES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt = models.DateTimeField('Следующая попытка', auto_now_add=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt']
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt'],
+                name='outbox_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} → {self.to}'
@@ -0,0 +1,153 @@
+import logging
+from email import message_from_bytes
+
+from django.conf import settings
+from django.core.mail import (EmailMessage, EmailMultiAlternatives,
+                              get_connection)
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 60
+LEASE = 5 * 60
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который только ставит письма в очередь.
+
+    Запрос отвечает сразу после вставки строк в базу, а доставкой
+    занимается команда send_outbox.
+    """
+
+    def send_messages(self, email_messages):
+        emails = []
+        for message in email_messages:
+            html_body = ''
+            for content, mimetype in getattr(message, 'alternatives', ()):
+                if mimetype == 'text/html':
+                    html_body = content
+            emails.append(OutgoingEmail(
+                subject=message.subject,
+                body=message.body,
+                html_body=html_body,
+                from_email=message.from_email,
+                to='\n'.join(message.to),
+                cc='\n'.join(message.cc),
+                bcc='\n'.join(message.bcc),
+                message=message.message().as_bytes(),
+            ))
+        OutgoingEmail.objects.bulk_create(emails)
+        return len(emails)
+
+
+def _lines(value):
+    return value.split('\n') if value else []
+
+
+class QueuedMessage(EmailMessage):
+    """Письмо из очереди: сохранённый MIME и адреса конверта."""
+
+    def __init__(self, email, connection):
+        super().__init__(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email,
+            to=_lines(email.to),
+            cc=_lines(email.cc),
+            bcc=_lines(email.bcc),
+            connection=connection,
+        )
+        self.raw = bytes(email.message)
+
+    def message(self):
+        return message_from_bytes(self.raw)
+
+
+def _message(email, connection):
+    if email.message:
+        return QueuedMessage(email, connection)
+    # Письма, поставленные в очередь до появления поля message.
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=_lines(email.to),
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return timezone.timedelta(seconds=RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim(batch_size, now):
+    """Забирает пачку писем, срок которых подошёл.
+
+    Письмам выставляется аренда: пока она не истекла, другие
+    обработчики их не берут, а после падения обработчика письма
+    вернутся в работу сами. Транзакция короткая и не держит
+    блокировку базы на время общения с почтовым сервером.
+    """
+    with transaction.atomic():
+        ids = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.PENDING, next_attempt__lte=now)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=ids).update(
+            next_attempt=now + timezone.timedelta(seconds=LEASE)
+        )
+    return list(OutgoingEmail.objects.filter(pk__in=ids))
+
+
+def deliver(batch_size=BATCH_SIZE, now=None):
+    """Отправляет пачку писем через одно соединение с почтовым сервером.
+
+    Возвращает пару (отправлено, не удалось).
+    """
+    now = now or timezone.now()
+    emails = claim(batch_size, now)
+    if not emails:
+        return 0, 0
+    sent = failed = 0
+    connection = get_connection(settings.OUTBOX_DELIVERY_BACKEND)
+    try:
+        connection.open()
+        open_error = None
+    except Exception as error:
+        open_error = error
+    try:
+        for email in emails:
+            email.attempts += 1
+            try:
+                if open_error is not None:
+                    raise open_error
+                _message(email, connection).send()
+            except Exception as error:
+                logger.warning('Письмо %s не отправлено: %s', email.pk, error)
+                failed += 1
+                email.last_error = str(error)
+                if email.attempts >= MAX_ATTEMPTS:
+                    email.status = OutgoingEmail.FAILED
+                else:
+                    email.next_attempt = now + retry_delay(email.attempts)
+            else:
+                sent += 1
+                email.status = OutgoingEmail.SENT
+                email.sent = timezone.now()
+    finally:
+        connection.close()
+    OutgoingEmail.objects.bulk_update(
+        emails, ['attempts', 'status', 'next_attempt', 'last_error', 'sent']
+    )
+    return sent, failed
@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import outbox
+from .hashers import ScryptPasswordHasher
+from .models import OutgoingEmail
+
+User = get_user_model()
+
+PASSWORD = 'correct-horse-battery'
+
+
+class CheapScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = 2 ** 4
+
+
+class ScryptHasherTests(TestCase):
+    def test_encode_and_verify(self):
+        hasher = CheapScryptPasswordHasher()
+        encoded = hasher.encode(PASSWORD, hasher.salt())
+        self.assertTrue(encoded.startswith('scrypt$16$'))
+        self.assertTrue(hasher.verify(PASSWORD, encoded))
+        self.assertFalse(hasher.verify('wrong', encoded))
+        self.assertFalse(hasher.must_update(encoded))
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def _create_user(self):
+        return User.objects.create_user(username='user', password=PASSWORD)
+
+    @override_settings(PASSWORD_HASHERS=[
+        'users.tests.CheapScryptPasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def test_rehash_on_login(self):
+        """Пароль со старым хешем перехешируется основным при входе."""
+        user = self._create_user()
+        self.assertTrue(user.password.startswith('md5$'))
+        response = self.client.post(
+            reverse('users:login'),
+            {'username': 'user', 'password': PASSWORD}
+        )
+        self.assertEqual(response.status_code, 302)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+
+
+class BrokenEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+@override_settings(
+    EMAIL_BACKEND='users.outbox.OutboxEmailBackend',
+    OUTBOX_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(
+            username='user', email='user@example.com', password=PASSWORD
+        )
+
+    def reset_password(self):
+        return self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'user@example.com'}
+        )
+
+    def test_reset_is_queued_and_delivered(self):
+        """Письмо сброса пароля ставится в очередь и уходит из неё."""
+        self.reset_password()
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.to, 'user@example.com')
+        self.assertEqual(outbox.deliver(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.SENT)
+        self.assertEqual(outbox.deliver(), (0, 0))
+
+    @override_settings(
+        OUTBOX_DELIVERY_BACKEND='users.tests.BrokenEmailBackend'
+    )
+    def test_retry_with_backoff(self):
+        """Неудачная отправка повторяется с растущей задержкой."""
+        self.reset_password()
+        now = timezone.now()
+        self.assertEqual(outbox.deliver(now=now), (0, 1))
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertEqual(email.next_attempt, now + outbox.retry_delay(1))
+        self.assertEqual(outbox.deliver(now=now), (0, 0))
+        for _ in range(outbox.MAX_ATTEMPTS - 1):
+            now = OutgoingEmail.objects.get().next_attempt
+            outbox.deliver(now=now)
+        self.assertEqual(
+            OutgoingEmail.objects.get().status, OutgoingEmail.FAILED
+        )
+
+    def test_envelope_and_message_are_kept(self):
+        """Bcc не попадает в заголовки, остальное письмо — как было."""
+        message = mail.EmailMessage(
+            'Тема', 'Текст', 'site@example.com',
+            to=['to@example.com'], cc=['cc@example.com'],
+            bcc=['secret@example.com'], reply_to=['reply@example.com'],
+            headers={'X-Campaign': 'digest'},
+        )
+        message.attach('report.txt', 'Отчёт', 'text/plain')
+        message.send()
+        self.assertEqual(outbox.deliver(), (1, 0))
+        sent = mail.outbox[0]
+        self.assertEqual(
+            sent.recipients(),
+            ['to@example.com', 'cc@example.com', 'secret@example.com']
+        )
+        mime = sent.message()
+        self.assertEqual(mime['To'], 'to@example.com')
+        self.assertEqual(mime['Cc'], 'cc@example.com')
+        self.assertEqual(mime['Reply-To'], 'reply@example.com')
+        self.assertEqual(mime['X-Campaign'], 'digest')
+        self.assertNotIn('secret@example.com', mime.as_string())
+        self.assertEqual(
+            [part.get_filename() for part in mime.walk()
+             if part.get_filename()],
+            ['report.txt']
+        )
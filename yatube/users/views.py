@@ -1,8 +1,13 @@
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from core.querybudget import query_budget
+from core.ratelimit import ratelimit
 from .forms import CreationForm
 
 
+@method_decorator(query_budget(3), name='dispatch')
+@method_decorator(ratelimit('10/h'), name='dispatch')
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
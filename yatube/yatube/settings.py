@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -19,18 +21,36 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
 
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = '6^&!+_^1h!lj=m__sf-*yn)+0tnx1u$!gn141#-x8ev2cg4#1_'
+# Профиль запуска: development включает отладку и инструменты
+# разработчика, production подключает только то, что нужно для
+# обслуживания запросов, и потому быстрее стартует и занимает
+# меньше памяти. Стоимость импорта показывает manage.py import_profile.
+RUNTIME_PROFILES = ('development', 'production')
+RUNTIME_PROFILE = os.getenv('YATUBE_PROFILE', 'development')
+if RUNTIME_PROFILE not in RUNTIME_PROFILES:
+    raise ImproperlyConfigured(f'Неизвестный профиль {RUNTIME_PROFILE}')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = RUNTIME_PROFILE == 'development'
+
+# SECURITY WARNING: keep the secret key used in production secret!
+# Ключ из репозитория годится только для разработки.
+SECRET_KEY = os.getenv('YATUBE_SECRET_KEY')
+if not SECRET_KEY:
+    if not DEBUG:
+        raise ImproperlyConfigured(
+            'Для профиля production задайте YATUBE_SECRET_KEY'
+        )
+    SECRET_KEY = '6^&!+_^1h!lj=m__sf-*yn)+0tnx1u$!gn141#-x8ev2cg4#1_'
 
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
     '[::1]',
-    'testserver',
-]
+] + os.getenv('YATUBE_ALLOWED_HOSTS', '').split()
+if DEBUG:
+    # Хост тестового клиента Django.
+    ALLOWED_HOSTS.append('testserver')
 
 
 # Application definition
@@ -47,19 +67,27 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
     'sorl.thumbnail',
-    'debug_toolbar'
+]
+# Приложения, нужные только при разработке.
+DEV_APPS = [
+    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.profiler.ProfilerMiddleware',
+    'core.compression.CompressionMiddleware',
+    'core.slowqueries.SlowQueryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
+if DEBUG:
+    INSTALLED_APPS += DEV_APPS
+    MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware']
 
 INTERNAL_IPS = [
     '127.0.0.1',
@@ -67,6 +95,9 @@ INTERNAL_IPS = [
 
 ROOT_URLCONF = 'yatube.urls'
 
+# Размер пула потоков, в котором yatube.asgi выполняет Django.
+ASGI_THREADS = int(os.getenv('YATUBE_ASGI_THREADS', 16))
+
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
@@ -104,6 +135,61 @@ CACHES = {
     }
 }
 
+# Окна ограничения частоты (core.ratelimit) должны быть общими для всех
+# процессов: у LocMemCache они свои в каждом воркере, лимит умножается
+# на число процессов и сбрасывается при перезапуске. Поэтому вне отладки
+# счётчики живут в Memcached (YATUBE_RATELIMIT_MEMCACHED=host:port,
+# атомарный incr) или в таблице базы, которую создаёт
+# manage.py createcachetable (incr там не атомарен, и при гонке лимит
+# может быть превышен на единицы запросов).
+if os.getenv('YATUBE_RATELIMIT_MEMCACHED'):
+    CACHES['ratelimit'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.getenv('YATUBE_RATELIMIT_MEMCACHED'),
+    }
+elif DEBUG:
+    CACHES['ratelimit'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ratelimit',
+    }
+else:
+    CACHES['ratelimit'] = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'yatube_ratelimit',
+    }
+
+# Сколько секунд обратный прокси может отдавать общую для всех
+# оболочку страницы из своего кэша (s-maxage); браузер каждый раз
+# её перепроверяет. Личные данные подгружаются отдельно с /viewer/.
+SHARED_CACHE_SECONDS = 20
+
+# Сколько секунд долгий опрос уведомлений ждёт новых событий.
+NOTIFICATIONS_POLL_TIMEOUT = 25
+# Сколько долгих опросов может ждать одновременно в одном процессе:
+# каждый занимает поток воркера, и остальным страницам их должно хватать.
+NOTIFICATIONS_MAX_WAITERS = max(1, ASGI_THREADS // 4)
+
+# Сколько потоков SSE живого обновления лент может быть открыто
+# одновременно в одном процессе; каждый занимает поток воркера.
+LIVE_FEED_MAX_STREAMS = max(1, ASGI_THREADS // 4)
+
+# Что делать, если представление превысило бюджет запросов
+# (core.querybudget): 'log' — предупреждение, 'raise' — исключение,
+# None — не считать запросы вовсе.
+QUERY_BUDGET_ACTION = 'log' if DEBUG else None
+
+# Запросы дольше стольких миллисекунд попадают в журнал медленных
+# запросов с планом выполнения (manage.py slow_queries); 0 — выключить.
+SLOW_QUERY_MS = int(os.getenv('YATUBE_SLOW_QUERY_MS', 200)) or None
+
+# Доля запросов, стеки которых сэмплирует профилировщик (manage.py
+# flamegraph); 0 — выключить. Для продакшена хватает 0.01.
+PROFILER_RATE = float(os.getenv('YATUBE_PROFILER_RATE', 0))
+PROFILER_INTERVAL_MS = int(os.getenv('YATUBE_PROFILER_INTERVAL_MS', 10))
+PROFILER_DIR = os.getenv(
+    'YATUBE_PROFILER_DIR', os.path.join(BASE_DIR, 'profiles')
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -122,6 +208,41 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Профиль производительности входа: какой хешер паролей считается
+# основным и где хранятся сессии. Пароли, захешированные прежним
+# хешером, перехешируются основным при следующем входе.
+AUTH_PROFILES = {
+    'default': {
+        'hasher': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'session_engine': 'django.contrib.sessions.backends.db',
+    },
+    'fast': {
+        'hasher': 'users.hashers.ScryptPasswordHasher',
+        'session_engine': 'django.contrib.sessions.backends.cached_db',
+    },
+    'argon2': {
+        'hasher': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'session_engine': 'django.contrib.sessions.backends.cached_db',
+    },
+    'stateless': {
+        'hasher': 'users.hashers.ScryptPasswordHasher',
+        'session_engine': 'django.contrib.sessions.backends.signed_cookies',
+    },
+}
+AUTH_PROFILE = AUTH_PROFILES[os.getenv('YATUBE_AUTH_PROFILE', 'default')]
+
+PASSWORD_HASHERS = [AUTH_PROFILE['hasher']] + [
+    hasher for hasher in (
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'users.hashers.ScryptPasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    )
+    if hasher != AUTH_PROFILE['hasher']
+]
+SESSION_ENGINE = AUTH_PROFILE['session_engine']
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
@@ -142,10 +263,30 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+if not DEBUG:
+    # collectstatic кладёт файлы с хешем в имени и их сжатые копии,
+    # core.views.serve_static отдаёт подходящий вариант.
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма ставятся в очередь и отправляются командой send_outbox
+# через OUTBOX_DELIVERY_BACKEND (SMTP в бою, файлы или консоль локально).
+EMAIL_BACKEND = 'users.outbox.OutboxEmailBackend'
+OUTBOX_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Ограничение частоты запросов к записывающим представлениям.
+# Лимиты задаются декоратором core.ratelimit.ratelimit и могут быть
+# переопределены здесь по имени URL, например {'posts:post_create': '5/m'}.
+RATELIMIT_ENABLED = True
+RATELIMIT_CACHE = 'ratelimit'
+if not DEBUG and CACHES[RATELIMIT_CACHE]['BACKEND'].endswith('LocMemCache'):
+    raise ImproperlyConfigured(
+        'RATELIMIT_CACHE не может быть LocMemCache вне отладки: '
+        'у каждого процесса были бы свои лимиты'
+    )
+RATELIMITS = {}